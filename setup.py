@@ -34,6 +34,8 @@ setup(
             "imbie-validate = validator.cli:main",
             "imbie-unpack = validator.cli:unpack",
             "imbie-report = validator.cli:report",
+            "imbie-validate-server = validator.cli:serve",
+            "imbie-validate-client = validator.cli:client",
         ]
     },
     include_package_data=True,
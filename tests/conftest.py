@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def make_series():
+    """
+    create random dm series with the awkward parts of real submissions:
+    repeated times, a gap, a run of missing dm values longer than a
+    window, and missing errors
+    """
+
+    def make(n: int = 300, seed: int = 0, shuffle: bool = False):
+        rng = np.random.default_rng(seed)
+        t = 2000.0 + np.sort(rng.uniform(0.0, 20.0, n))
+        t[n // 6 : n // 6 + 10] = t[n // 6]
+        t[n * 5 // 6 :] += 5.0
+
+        dm = np.cumsum(rng.normal(-5.0, 3.0, n))
+        sigma_dm = rng.uniform(1.0, 5.0, n)
+        dm[n // 3 : n // 3 + 40] = np.nan
+        sigma_dm[n * 2 // 3 : n * 2 // 3 + 30] = np.nan
+
+        if shuffle:
+            order = rng.permutation(n)
+            t, dm, sigma_dm = t[order], dm[order], sigma_dm[order]
+        return t, dm, sigma_dm
+
+    return make
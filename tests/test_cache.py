@@ -0,0 +1,79 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from validator.core.cache import ContributionCache
+from validator.core.gridded import HEADER_EXT, GriddedData
+from validator.core.validate import validate_gridded_file
+
+GRID = "\n".join(f"{i}, {i * 0.5}, {'nan' if i % 7 == 0 else i * 2}" for i in range(50))
+
+
+@pytest.fixture
+def conversions(monkeypatch):
+    """
+    count the conversions of gridded uploads
+    """
+    count = [0]
+    convert = GriddedData.convert.__func__
+
+    def counting(cls, *args, **kwargs):
+        count[0] += 1
+        return convert(cls, *args, **kwargs)
+
+    monkeypatch.setattr(GriddedData, "convert", classmethod(counting))
+    return count
+
+
+def test_gridded_conversion_is_reused(tmp_path, conversions):
+    cache = ContributionCache(str(tmp_path / "cache"))
+
+    first = cache.load_gridded(io.BytesIO(GRID.encode()), "a.csv")
+    second = cache.load_gridded(io.BytesIO(GRID.encode()), "b.csv")
+
+    assert conversions[0] == 1
+    assert first.path == second.path
+    assert (first.source, second.source) == ("a.csv", "b.csv")
+    np.testing.assert_array_equal(first.array(), second.array())
+    assert second.shape == (50, 3)
+
+
+def test_cached_gridded_messages(tmp_path, conversions):
+    path = tmp_path / "grid.csv"
+    path.write_text(GRID)
+    cache = ContributionCache(str(tmp_path / "cache"))
+
+    expected = list(validate_gridded_file(str(path)))
+    assert [m.title for m in expected] == ["Missing values in gridded data"]
+    for _ in range(2):
+        assert list(validate_gridded_file(str(path), cache=cache)) == expected
+    assert conversions[0] == 2
+
+
+def test_damaged_gridded_entry(tmp_path, conversions):
+    cache = ContributionCache(str(tmp_path / "cache"))
+    data = cache.load_gridded(io.BytesIO(GRID.encode()))
+
+    with open(data.header_path, "w") as f:
+        f.write("{")
+    again = cache.load_gridded(io.BytesIO(GRID.encode()))
+
+    assert conversions[0] == 2
+    np.testing.assert_array_equal(again.array(), data.array())
+
+
+def test_gridded_entries_are_evicted(tmp_path):
+    cache = ContributionCache(str(tmp_path / "cache"), max_size=2000)
+
+    old = cache.load_gridded(io.BytesIO(GRID.encode()))
+    os.utime(old.header_path, (0, 0))
+    new = cache.load_gridded(io.BytesIO((GRID + "\n1, 2, 3").encode()))
+
+    assert not os.path.exists(old.path)
+    assert not os.path.exists(old.path + HEADER_EXT)
+    assert os.path.exists(new.path)
+    assert sorted(os.listdir(cache.directory)) == sorted(
+        os.path.basename(p) for p in (new.path, new.header_path)
+    )
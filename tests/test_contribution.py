@@ -0,0 +1,69 @@
+import io
+import os
+
+import pytest
+
+from validator.cli.main import DEFAULT_SCHEMA
+from validator.model.contribution import Contribution
+from validator.model.schema import Schema
+
+TEST_CSV = os.path.join(os.path.dirname(__file__), os.pardir, "test.csv")
+
+
+@pytest.fixture
+def contribution():
+    schema = Schema.read_all(io.BytesIO(DEFAULT_SCHEMA))["dm"]
+    return Contribution.from_file(TEST_CSV, schema)
+
+
+def ids(series):
+    return [id(s) for s in series]
+
+
+def check_index(contribution):
+    """
+    every lookup must agree with a scan of the list of series
+    """
+    for series in contribution.series:
+        matches = [s for s in contribution.series if s.basin_id == series.basin_id]
+        assert contribution.get(basin_id=series.basin_id) is matches[0]
+        assert ids(contribution.filter(basin_id=series.basin_id).series) == ids(matches)
+    groups = {s.basin_group for s in contribution.series}
+    for group in groups:
+        matches = [s for s in contribution.series if s.basin_group == group]
+        assert ids(contribution.filter(basin_group=group).series) == ids(matches)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda series: series.__setitem__(0, series[1]),
+        lambda series: series.__setitem__(slice(0, 2), series[2:4]),
+        lambda series: series.__delitem__(0),
+        lambda series: series.insert(0, series.pop()),
+        lambda series: series.pop(2),
+        lambda series: series.reverse(),
+        lambda series: series.sort(key=lambda s: str(s.basin_id), reverse=True),
+        lambda series: series.append(series[0]),
+        lambda series: series.extend(series[:2]),
+        lambda series: series.clear(),
+    ],
+)
+def test_index_follows_series_list(contribution, change):
+    check_index(contribution)
+    removed = contribution.series[0]
+
+    change(contribution.series)
+
+    check_index(contribution)
+    if id(removed) not in ids(contribution.series):
+        assert contribution.get(basin_id=removed.basin_id) is None
+
+
+def test_joined_contributions(contribution):
+    joined = contribution.join(contribution)
+    assert len(joined.series) == 2 * len(contribution.series)
+    check_index(joined)
+
+    contribution.series.pop()
+    assert len(joined.series) == 2 * len(contribution.series) + 2
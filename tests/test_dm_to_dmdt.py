@@ -0,0 +1,116 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from validator.proc.dm_to_dmdt import dm_to_dmdt, dm_to_dmdt_diagnostics
+from validator.proc.dm_to_dmdt.dm_to_dmdt import LSQMethod
+from validator.proc.dm_to_dmdt.window_index import (
+    sort_series,
+    window_extents,
+    window_index,
+)
+
+WINDOW_MODES = [
+    dict(truncate=True),
+    dict(truncate=False, tapering=True),
+    dict(truncate=False),
+]
+
+# each cumulative method, and the lscov method it replaces
+METHODS = [
+    (LSQMethod.cumulative_normal, LSQMethod.normal),
+    (LSQMethod.cumulative_weighted, LSQMethod.weighted),
+]
+
+
+def n_records(t, wsize, truncate=True, tapering=False, min_tapering=0.75):
+    """
+    number of records in the window of each posting
+    """
+    wmin, wmax = window_extents(t, t, wsize, truncate, tapering, min_tapering)
+    start, stop = window_index(sort_series(t)[0], wmin, wmax)
+    return stop - start
+
+
+def assert_same_fits(expected, actual, n):
+    """
+    compare two dm_to_dmdt results. windows of two records have a slope
+    but no error estimate, which may be infinite or NaN
+    """
+    tout, dmdt, sigma_dmdt = actual
+    np.testing.assert_array_equal(tout, expected[0])
+    np.testing.assert_allclose(dmdt, expected[1], rtol=1e-6, atol=1e-8)
+
+    few = n < 3
+    assert not np.isfinite(sigma_dmdt[few]).any()
+    assert not np.isfinite(expected[2][few]).any()
+    np.testing.assert_allclose(
+        sigma_dmdt[~few], expected[2][~few], rtol=1e-6, atol=1e-8
+    )
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+@pytest.mark.parametrize("wsize", [0.3, 1.0, 3.0])
+@pytest.mark.parametrize("mode", WINDOW_MODES)
+@pytest.mark.parametrize("method, reference", METHODS)
+def test_cumulative_matches_lscov(make_series, method, reference, mode, wsize, shuffle):
+    t, dm, sigma_dm = make_series(shuffle=shuffle)
+
+    with warnings.catch_warnings():
+        # lscov warns on windows without an error estimate
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = dm_to_dmdt(t, dm, sigma_dm, wsize, lsq_method=reference, **mode)
+    actual = dm_to_dmdt(t, dm, sigma_dm, wsize, lsq_method=method, **mode)
+
+    assert_same_fits(expected, actual, n_records(t, wsize, **mode))
+
+
+@pytest.mark.parametrize("method", [method for method, _ in METHODS])
+def test_windows_without_fits(make_series, method):
+    t, dm, sigma_dm = make_series()
+    wsize = 0.3
+    n = n_records(t, wsize)
+
+    # windows which are empty, hold a single record or only missing values
+    assert (n == 0).any() and (n == 1).any()
+    empty = (n < 2) | np.isnan(dm)
+    actual = dm_to_dmdt(t, dm, sigma_dm, wsize, lsq_method=method)
+    assert np.isnan(actual[1][empty]).all()
+
+
+@pytest.mark.parametrize("method", [method for method, _ in METHODS])
+def test_all_missing(method):
+    t = np.linspace(2000.0, 2010.0, 50)
+    dm = np.full(t.shape, np.nan)
+    sigma_dm = np.ones_like(t)
+
+    _, dmdt, sigma_dmdt = dm_to_dmdt(t, dm, sigma_dm, 1.0, lsq_method=method)
+    assert np.isnan(dmdt).all()
+    assert np.isnan(sigma_dmdt).all()
+
+
+@pytest.mark.parametrize("method, reference", METHODS)
+def test_diagnostics(make_series, method, reference):
+    t, dm, sigma_dm = make_series()
+
+    result = dm_to_dmdt(t, dm, sigma_dm, 1.0, lsq_method=method, debug=True)
+    assert len(result) == 3
+
+    *values, fits = dm_to_dmdt_diagnostics(t, dm, sigma_dm, 1.0, lsq_method=method)
+    for x, y in zip(values, result):
+        np.testing.assert_array_equal(x, y)
+
+    np.testing.assert_array_equal(fits.slope, result[1])
+    np.testing.assert_array_equal(fits.n_records, n_records(t, 1.0))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        *_, expected = dm_to_dmdt_diagnostics(
+            t, dm, sigma_dm, 1.0, lsq_method=reference
+        )
+    fitted = np.isfinite(expected.slope)
+    assert fitted.any()
+    np.testing.assert_allclose(
+        fits.intercept[fitted], expected.intercept[fitted], rtol=1e-6
+    )
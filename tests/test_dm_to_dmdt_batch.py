@@ -0,0 +1,75 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from validator.proc.dm_to_dmdt import RaggedSeries, dm_to_dmdt, dm_to_dmdt_batch
+from validator.proc.dm_to_dmdt.dm_to_dmdt import LSQMethod
+
+WINDOW_MODES = [
+    dict(truncate=True),
+    dict(truncate=False, tapering=True),
+    dict(truncate=False),
+]
+
+
+@pytest.fixture
+def ragged(make_series):
+    # ragged lengths, including empty series and ones too short to fit
+    lengths = [300, 0, 1, 2, 5, 0, 120, 40]
+    return RaggedSeries.from_arrays(
+        make_series(n, seed=k, shuffle=k % 2 == 1) if n >= 12 else _short(n, k)
+        for k, n in enumerate(lengths)
+    )
+
+
+def _short(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    t = 2000.0 + np.sort(rng.uniform(0.0, 2.0, n))
+    return t, rng.normal(0.0, 10.0, n), rng.uniform(1.0, 5.0, n)
+
+
+@pytest.mark.parametrize("mode", WINDOW_MODES)
+@pytest.mark.parametrize(
+    "method",
+    [
+        LSQMethod.cumulative_normal,
+        LSQMethod.cumulative_weighted,
+        LSQMethod.normal,
+        LSQMethod.weighted,
+    ],
+)
+def test_batch_matches_each_series(ragged, method, mode):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        result = dm_to_dmdt_batch(ragged, 1.0, lsq_method=method, **mode)
+
+        assert len(result) == len(ragged)
+        np.testing.assert_array_equal(result.offsets, ragged.offsets)
+
+        for (t, dm, sigma_dm), (tout, dmdt, sigma_dmdt) in zip(ragged, result):
+            if not t.size:
+                assert not tout.size and not dmdt.size and not sigma_dmdt.size
+                continue
+
+            expected = dm_to_dmdt(t, dm, sigma_dm, 1.0, lsq_method=method, **mode)
+            np.testing.assert_array_equal(tout, expected[0])
+            np.testing.assert_allclose(dmdt, expected[1], rtol=1e-6, atol=1e-8)
+            np.testing.assert_allclose(sigma_dmdt, expected[2], rtol=1e-6, atol=1e-8)
+
+
+def test_batch_in_processes(ragged):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        serial = dm_to_dmdt_batch(ragged, 1.0, lsq_method=LSQMethod.normal)
+        parallel = dm_to_dmdt_batch(ragged, 1.0, lsq_method=LSQMethod.normal, jobs=2)
+
+    for a, b in zip(serial, parallel):
+        for x, y in zip(a, b):
+            np.testing.assert_array_equal(x, y)
+
+
+def test_empty_batch():
+    series = RaggedSeries.from_arrays([])
+    result = dm_to_dmdt_batch(series, 1.0, lsq_method=LSQMethod.cumulative_normal)
+    assert len(result) == 0
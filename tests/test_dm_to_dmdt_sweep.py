@@ -0,0 +1,60 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from validator.proc.dm_to_dmdt import dm_to_dmdt, dm_to_dmdt_sweep
+from validator.proc.dm_to_dmdt.dm_to_dmdt import LSQMethod
+
+WSIZES = [0.3, 1.0, 2.5, 5.0]
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+@pytest.mark.parametrize(
+    "mode",
+    [dict(truncate=True), dict(truncate=False, tapering=True), dict(truncate=False)],
+)
+@pytest.mark.parametrize(
+    "method",
+    [
+        LSQMethod.cumulative_normal,
+        LSQMethod.cumulative_weighted,
+        LSQMethod.normal,
+        LSQMethod.weighted,
+    ],
+)
+def test_sweep_matches_each_window(make_series, method, mode, shuffle):
+    t, dm, sigma_dm = make_series(shuffle=shuffle)
+    tout = np.arange(2000.0, 2026.0, 1.0 / 12.0)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        result = dm_to_dmdt_sweep(
+            t, dm, sigma_dm, WSIZES, tout, lsq_method=method, **mode
+        )
+        expected = [
+            dm_to_dmdt(t, dm, sigma_dm, wsize, tout, lsq_method=method, **mode)
+            for wsize in WSIZES
+        ]
+
+    tout_sweep, dmdt, sigma_dmdt = result
+    np.testing.assert_array_equal(tout_sweep, tout)
+    assert dmdt.shape == sigma_dmdt.shape == (len(WSIZES), tout.size)
+
+    for k, (_, expected_dmdt, expected_sigma) in enumerate(expected):
+        np.testing.assert_allclose(dmdt[k], expected_dmdt, rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(sigma_dmdt[k], expected_sigma, rtol=1e-9, atol=1e-12)
+
+
+def test_sweep_at_input_postings(make_series):
+    t, dm, sigma_dm = make_series()
+    tout, dmdt, _ = dm_to_dmdt_sweep(
+        t, dm, sigma_dm, WSIZES, lsq_method=LSQMethod.cumulative_normal
+    )
+
+    np.testing.assert_array_equal(tout, t)
+    for k, wsize in enumerate(WSIZES):
+        _, expected, _ = dm_to_dmdt(
+            t, dm, sigma_dm, wsize, lsq_method=LSQMethod.cumulative_normal
+        )
+        np.testing.assert_allclose(dmdt[k], expected, rtol=1e-9, atol=1e-12)
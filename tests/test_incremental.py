@@ -0,0 +1,98 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from validator.proc.dm_to_dmdt import DmdtState, dm_to_dmdt
+from validator.proc.dm_to_dmdt.dm_to_dmdt import LSQMethod
+
+METHODS = [
+    LSQMethod.cumulative_normal,
+    LSQMethod.cumulative_weighted,
+    LSQMethod.normal,
+    LSQMethod.weighted,
+]
+WINDOW_MODES = [
+    dict(truncate=True),
+    dict(truncate=False, tapering=True),
+    dict(truncate=False),
+]
+
+
+def assert_converts(state: DmdtState, t, dm, sigma_dm, tout, settings):
+    """
+    check a state against a full conversion of its whole input
+    """
+    np.testing.assert_array_equal(state.t, t)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = dm_to_dmdt(t, dm, sigma_dm, tout=tout, **settings)
+
+    np.testing.assert_array_equal(state.tout, expected[0])
+    np.testing.assert_allclose(state.dmdt, expected[1], rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(state.sigma_dmdt, expected[2], rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.parametrize("fixed_tout", [False, True])
+@pytest.mark.parametrize("shuffle", [False, True])
+@pytest.mark.parametrize("mode", WINDOW_MODES)
+@pytest.mark.parametrize("method", METHODS)
+def test_updates_match_full_conversion(make_series, method, mode, shuffle, fixed_tout):
+    t, dm, sigma_dm = make_series(shuffle=shuffle)
+    settings = dict(wsize=1.0, lsq_method=method, **mode)
+    tout = np.arange(2000.0, 2026.0, 1.0 / 12.0) if fixed_tout else None
+
+    # the series as received: a first part, one appended batch, a
+    #  complete new version, then a chain of appended batches
+    cuts = [120, 150, 200, 230, 240, 241, 241, 300]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        state = DmdtState.create(
+            t[:120], dm[:120], sigma_dm[:120], tout=tout, **settings
+        )
+    assert_converts(state, t[:120], dm[:120], sigma_dm[:120], tout, settings)
+
+    for step, (prev, n) in enumerate(zip(cuts[:-1], cuts[1:])):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            if step == 1:
+                state = state.update(t[:n], dm[:n], sigma_dm[:n])
+            else:
+                state = state.append(t[prev:n], dm[prev:n], sigma_dm[prev:n])
+        assert_converts(state, t[:n], dm[:n], sigma_dm[:n], tout, settings)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_update_with_changed_records(make_series, method):
+    t, dm, sigma_dm = make_series()
+    settings = dict(wsize=1.0, lsq_method=method)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        state = DmdtState.create(t[:200], dm[:200], sigma_dm[:200], **settings)
+
+        # a revised record means the new version does not extend the old one
+        dm = dm.copy()
+        dm[10] += 100.0
+        state = state.update(t, dm, sigma_dm)
+
+    assert_converts(state, t, dm, sigma_dm, None, settings)
+
+
+def test_append_out_of_order(make_series):
+    t, dm, sigma_dm = make_series()
+    settings = dict(wsize=1.0, lsq_method=LSQMethod.cumulative_normal)
+
+    # records appended before the end of the previous input
+    first = np.r_[0:150, 200:300]
+    late = np.r_[150:200]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        state = DmdtState.create(t[first], dm[first], sigma_dm[first], **settings)
+        state = state.append(t[late], dm[late], sigma_dm[late])
+
+    order = np.r_[first, late]
+    assert not state.is_sorted
+    assert_converts(state, t[order], dm[order], sigma_dm[order], None, settings)
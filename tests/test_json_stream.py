@@ -0,0 +1,115 @@
+import base64
+import io
+import json
+import random
+
+import pytest
+
+from validator.helpers.json_stream import DataURL, dump_json, load_json
+
+CHUNK_SIZES = [1, 2, 3, 4, 5, 7, 16, 64, 1000, 1 << 16]
+
+_random = random.Random(0)
+PAYLOADS = [
+    b"",
+    b"a",
+    b"ab",
+    b"abc",
+    bytes(range(256)),
+    bytes(_random.getrandbits(8) for _ in range(10_000)),
+]
+
+
+def data_url(payload: bytes, media_type: str = "text/plain") -> str:
+    return f"data:{media_type};base64,{base64.b64encode(payload).decode()}"
+
+
+def escape_slashes(text: str) -> str:
+    """
+    escape every '/' in a JSON document, as some encoders do
+    """
+    return text.replace("/", "\\/")
+
+
+DOCUMENTS = [
+    {"name": "plain", "values": [1, -2, 3.25, -4.5e-7, 6.02e23, 12345678901234567890]},
+    {"flags": [True, False, None], "empty": [{}, [], ""]},
+    {"unicode": "café 氷 \U0001f9ca", "escapes": 'tab\t "quote" \\ \n'},
+    {"long": "x" * 5000, "not a url": "data:text/plain,plain text"},
+    {"upload": {"name": "a.csv", "data": data_url(PAYLOADS[1])}},
+    {"uploads": [data_url(payload) for payload in PAYLOADS]},
+    [data_url(PAYLOADS[-1], "application/octet-stream"), 0.1, "end"],
+]
+
+
+def resolve(obj):
+    """
+    replace each DataURL in a loaded document by its text
+    """
+    if isinstance(obj, DataURL):
+        obj.file.seek(0)
+        return obj.header + base64.b64encode(obj.file.read()).decode()
+    if isinstance(obj, dict):
+        return {key: resolve(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [resolve(value) for value in obj]
+    return obj
+
+
+def load(text: str, chunk_size: int):
+    return load_json(io.StringIO(text), lambda header: io.BytesIO(), chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize(
+    "encode",
+    [
+        json.dumps,
+        lambda obj: json.dumps(obj, indent=2, ensure_ascii=False),
+        lambda obj: escape_slashes(json.dumps(obj)),
+    ],
+)
+def test_load_matches_json_loads(document, chunk_size, encode):
+    text = encode(document)
+    assert resolve(load(text, chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_data_url_is_decoded(payload, chunk_size):
+    text = escape_slashes(json.dumps({"data": data_url(payload)}))
+    url = load(text, chunk_size)["data"]
+
+    assert url.header == "data:text/plain;base64,"
+    url.file.seek(0)
+    encoded = json.loads(text)["data"].partition(",")[2]
+    assert url.file.read() == base64.b64decode(encoded) == payload
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_numbers_across_chunks(chunk_size):
+    numbers = [0, -1, 10**20, 3.141592653589793, -2.5e-300, 1e308]
+    # shift the numbers across chunk boundaries
+    for padding in range(8):
+        text = " " * padding + json.dumps(numbers)
+        assert load(text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_dump_round_trip(document):
+    text = json.dumps(document)
+    out = io.StringIO()
+    dump_json(load(text, 7), out)
+    assert json.loads(out.getvalue()) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize(
+    "text", ['{"a": 1', '{"a": "text', "[1, 2,]", '{"a": 1} x', "nul", '"\\u00"']
+)
+def test_invalid_documents(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(text)
+    with pytest.raises(json.JSONDecodeError):
+        load(text, chunk_size)
@@ -0,0 +1,83 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from validator.proc.dm_to_dmdt.lscov import lscov, lscov_diag
+
+
+def line_fit(m: int, seed: int = 0):
+    """
+    design matrix and observations of a straight line fit to m records
+    """
+    rng = np.random.default_rng(seed)
+    t = 2000.0 + np.sort(rng.uniform(0.0, 3.0, m))
+    a = np.vstack([np.ones_like(t), t]).T
+    b = -12.0 * (t - 2000.0) + rng.normal(0.0, 2.0, m)
+    v = 1.0 / np.square(rng.uniform(0.5, 5.0, m))
+    return a, b, v
+
+
+@pytest.mark.parametrize("m", [3, 4, 10, 200])
+@pytest.mark.parametrize("weighted", [False, True])
+def test_matches_dense_lscov(m, weighted):
+    a, b, v = line_fit(m, seed=m)
+
+    if weighted:
+        expected = lscov(a, b, np.diag(v), dx=True)
+        actual = lscov_diag(a, b, v, dx=True)
+    else:
+        expected = lscov(a, b, dx=True)
+        actual = lscov_diag(a, b, dx=True)
+
+    for x, y in zip(actual, expected):
+        np.testing.assert_allclose(x, y, rtol=1e-6)
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_without_errors(weighted):
+    a, b, v = line_fit(20)
+    if weighted:
+        expected, actual = lscov(a, b, np.diag(v)), lscov_diag(a, b, v)
+    else:
+        expected, actual = lscov(a, b), lscov_diag(a, b)
+    np.testing.assert_allclose(actual, expected, rtol=1e-7)
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_exactly_determined(weighted):
+    # two records fit a line exactly, and leave no error estimate
+    a, b, v = line_fit(2)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if weighted:
+            x, dx = lscov_diag(a, b, v, dx=True)
+            expected = lscov(a, b, np.diag(v))
+        else:
+            x, dx = lscov_diag(a, b, dx=True)
+            expected = lscov(a, b)
+
+    np.testing.assert_allclose(x, expected, rtol=1e-7)
+    np.testing.assert_allclose(a.dot(x), b, rtol=1e-9)
+    assert not np.isfinite(dx).any()
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_rank_deficient(weighted):
+    # all records at one time cannot determine a slope
+    a, b, v = line_fit(10)
+    a[:, 1] = 0.0
+    v = v if weighted else None
+
+    with pytest.raises(np.linalg.LinAlgError):
+        lscov(a, b, None if v is None else np.diag(v), dx=True)
+    with pytest.raises(np.linalg.LinAlgError):
+        lscov_diag(a, b, v, dx=True)
+
+
+def test_under_determined():
+    a, b, v = line_fit(1)
+    with pytest.raises(Exception, match="over-determined"):
+        lscov(a, b)
+    with pytest.raises(Exception, match="over-determined"):
+        lscov_diag(a, b)
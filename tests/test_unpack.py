@@ -0,0 +1,39 @@
+import io
+import json
+
+import pytest
+
+from validator.cli.main import DEFAULT_SCHEMA
+from validator.const.severity import Severity
+from validator.core.batch import check_submission
+from validator.core.unpack import read_submission, unpack_buffers
+from validator.model.schema import Schema
+
+
+@pytest.fixture
+def malformed(tmp_path):
+    path = tmp_path / "submission.json"
+    path.write_text('{"group": "GMB", "time-series-upload": ')
+    return str(path)
+
+
+def test_read_malformed_submission(malformed):
+    with pytest.raises(ValueError, match="could not parse file") as e:
+        read_submission(malformed, lambda header: io.BytesIO())
+    assert isinstance(e.value.__cause__, json.JSONDecodeError)
+
+
+def test_unpack_malformed_submission(malformed):
+    with pytest.raises(ValueError, match="could not parse file"):
+        unpack_buffers(malformed)
+
+
+def test_check_malformed_submission(malformed):
+    schemas = Schema.read_all(io.BytesIO(DEFAULT_SCHEMA))
+    report = check_submission(malformed, None, schemas)
+
+    assert report.failed
+    [(path, message)] = report.messages
+    assert path == malformed
+    assert message.severity == Severity.error
+    assert "could not parse file" in message.description
@@ -0,0 +1,154 @@
+import io
+
+import pytest
+
+from validator.cli.main import DEFAULT_SCHEMA
+from validator.const.severity import Severity
+from validator.core.batch import validate_submission
+from validator.core.cache import ContributionCache
+from validator.core.plan import ValidationPlan
+from validator.core.results import ResultStore
+from validator.core.validate import validate_file
+from validator.model.contribution import Contribution
+from validator.model.schema import Schema
+
+BASINS = ["A-AP", "AP-B", "B-C", "C-CP", "CP-D", "D-DP", "DP-E", "E-EP", "EP-F"]
+
+
+@pytest.fixture
+def schema():
+    return Schema.read_all(io.BytesIO(DEFAULT_SCHEMA))["dmdt"]
+
+
+def dmdt_rows(bad=(), months=24):
+    """
+    monthly dmdt rows of one series per basin. series in `bad`
+    skip a month, and fail the interval check
+    """
+    rows = []
+    for k, basin in enumerate(BASINS):
+        for i in range(months):
+            if k in bad and i == months // 2:
+                continue
+            t = 2000.0 + i / 12.0
+            rows.append(
+                f"Smith, Altimetry, Rignot, {basin}, 1000, 900, "
+                f"{t:.6f}, {t + 1 / 12:.6f}, {-k - i * 0.1:.2f}, 1.5"
+            )
+    return rows
+
+
+def write_csv(path, rows):
+    path.write_text("\n".join(rows) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def series_read(monkeypatch):
+    """
+    count the series produced by streaming readers
+    """
+    count = [0]
+    iter_file = Contribution.iter_file
+
+    def counting(*args, **kwargs):
+        for series in iter_file(*args, **kwargs):
+            count[0] += 1
+            yield series
+
+    monkeypatch.setattr(Contribution, "iter_file", staticmethod(counting))
+    return count
+
+
+def test_stream_messages_as_series_are_read(tmp_path, schema, series_read):
+    path = write_csv(tmp_path / "dmdt.csv", dmdt_rows(bad={1}))
+
+    messages = validate_file(path, schema, streaming=True)
+    first = next(messages)
+
+    assert first.severity == Severity.error
+    assert "B" in first.description
+    # the error is in the second of nine series
+    assert series_read[0] == 2
+
+    assert list(messages) == []
+    assert series_read[0] == len(BASINS)
+
+
+def test_stream_stops_at_first_error(tmp_path, schema, series_read):
+    path = write_csv(tmp_path / "dmdt.csv", dmdt_rows(bad={1, 4}))
+
+    messages = list(
+        validate_submission(
+            path, "dmdt", {"dmdt": schema}, streaming=True, fail_fast=True
+        )
+    )
+    assert [m.severity for _, m in messages] == [Severity.error]
+    assert "B" in messages[0][1].description
+    # the series after the first error are never read
+    assert series_read[0] == 2
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_fail_fast_matches_first_error(tmp_path, schema, streaming):
+    path = write_csv(tmp_path / "dmdt.csv", dmdt_rows(bad={1, 4}))
+
+    whole = list(validate_file(path, schema))
+    assert len(whole) == 2
+    assert list(validate_file(path, schema, streaming, fail_fast=True)) == whole[:1]
+
+
+@pytest.mark.parametrize("bad", [set(), {0}, {1, 4}, {8}])
+def test_stream_matches_whole_read(tmp_path, schema, bad):
+    path = write_csv(tmp_path / "dmdt.csv", dmdt_rows(bad=bad))
+
+    streamed = list(validate_file(path, schema, streaming=True))
+    whole = list(validate_file(path, schema))
+    assert streamed == whole
+    assert len(whole) == len(bad)
+
+
+@pytest.mark.parametrize("bad", [set(), {0}, {1}, {0, 3}])
+def test_interleaved_stream_matches_whole_read(tmp_path, schema, bad):
+    rows = dmdt_rows(bad=bad)
+    # the last row of the first series comes after all the others
+    rows.append(rows.pop(22 if 0 in bad else 23))
+    path = write_csv(tmp_path / "dmdt.csv", rows)
+
+    whole = list(validate_file(path, schema))
+    with open(path, "rb") as f:
+        streamed = list(validate_file(f, schema, streaming=True))
+    assert sorted(streamed, key=repr) == sorted(whole, key=repr)
+    assert len(whole) == len(bad)
+
+
+@pytest.mark.parametrize("stored", [False, True])
+@pytest.mark.parametrize("bad", [set(), {0}, {1, 4}])
+def test_cached_matches_whole_read(tmp_path, schema, monkeypatch, bad, stored):
+    path = write_csv(tmp_path / "dmdt.csv", dmdt_rows(bad=bad))
+    whole = list(validate_file(path, schema))
+
+    cache = ContributionCache(str(tmp_path / "cache"))
+    results = ResultStore(str(tmp_path / "results.sqlite")) if stored else None
+
+    # the cached columns are checked as they are, without joining
+    #  the columns of each series again
+    def check(self, series):
+        assert not series, "columns joined"
+        return iter(())
+
+    monkeypatch.setattr(ValidationPlan, "check", check)
+    for _ in range(2):
+        assert list(validate_file(path, schema, cache=cache, results=results)) == whole
+        assert list(validate_file(path, schema, results=results)) == whole
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_unknown_basin(tmp_path, schema, streaming):
+    rows = dmdt_rows()
+    rows[30] = rows[30].replace("Rignot, AP-B", "Rignot, X-Y")
+    path = write_csv(tmp_path / "dmdt.csv", rows)
+
+    messages = list(validate_file(path, schema, streaming=streaming))
+    assert [m.title for m in messages] == ["Could not read contribution"]
+    assert "X-Y" in messages[0].description
@@ -1,5 +1,26 @@
-from .main import main
-from .unpack import main as unpack
-from .report import main as report
+"""
+command line tools. each is imported when it is first used, so that
+light commands (such as the validation client) start quickly
+"""
+from importlib import import_module
 
-__all__ = ["main", "unpack", "report"]
+# name of each command, and the module which provides it
+COMMANDS = {
+    "main": "main",
+    "unpack": "unpack",
+    "report": "report",
+    "serve": "daemon",
+    "client": "client",
+}
+
+__all__ = list(COMMANDS)
+
+
+def __getattr__(name: str):
+    if name not in COMMANDS:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    command = import_module(f"{__name__}.{COMMANDS[name]}").main
+    # importing a module replaces the attribute with the same name
+    globals()[name] = command
+    return command
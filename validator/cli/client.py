@@ -0,0 +1,116 @@
+"""
+client of the validation server. only light modules are imported,
+so that each check starts quickly
+"""
+import argparse as ap
+import json
+import os
+import sys
+
+from validator.const.severity import ExitCode
+from validator.core.protocol import DEFAULT_ADDRESS, parse_address, send_requests
+
+
+def create_parser(name: str, desc: str) -> ap.ArgumentParser:
+    """
+    create CLI argument parser
+    """
+    parser = ap.ArgumentParser(name, description=desc)
+    parser.add_argument(
+        "input",
+        metavar="DATA_FILE",
+        nargs="+",
+        help="CSV contribution files or JSON submissions to validate",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        metavar="FORMAT",
+        type=str,
+        help="name of file format schema to use",
+    )
+    parser.add_argument(
+        "-a",
+        "--address",
+        default=DEFAULT_ADDRESS,
+        help="unix socket path, or [host]:port of the server (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=ap.FileType("w"),
+        default=sys.stdout,
+        metavar="OUTPUT_PATH",
+        help="location to save output data",
+    )
+    output_format = parser.add_mutually_exclusive_group()
+    output_format.add_argument(
+        "-j", "--json", action="store_true", help="JSON format output"
+    )
+    output_format.add_argument(
+        "--jsonl", action="store_true", help="JSON lines output, one message per line"
+    )
+    parser.add_argument(
+        "--fail-fast", action="store_true", help="stop at the first error"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read data files in chunks, checking each series as it is read",
+    )
+    return parser
+
+
+def main() -> None:
+    parser = create_parser(__name__, "IMBIE3 validation client")
+    args = parser.parse_args()
+
+    requests = [
+        {
+            "path": os.path.abspath(path),
+            "format": args.format,
+            "stream": args.stream,
+            "fail_fast": args.fail_fast,
+        }
+        for path in args.input
+    ]
+
+    exit_code = ExitCode.ok
+    results = []
+
+    try:
+        for response in send_requests(parse_address(args.address), requests):
+            if not response["ok"]:
+                sys.exit(f"validation server error: {response['error']}")
+            if response["failed"]:
+                exit_code = ExitCode.validation_failed
+
+            if args.json:
+                results.append(response)
+                continue
+            for message in response["messages"]:
+                if args.jsonl:
+                    print(json.dumps(message), file=args.output, flush=True)
+                else:
+                    print(f"title: {message['title']}", file=args.output)
+                    print(f"severity: Severity.{message['severity']}", file=args.output)
+                    print(
+                        f"description: {message.get('description')}", file=args.output
+                    )
+
+            if args.fail_fast and response["failed"]:
+                break
+    except OSError as e:
+        sys.exit(f"cannot reach validation server at {args.address}: {e}")
+
+    if args.json:
+        json.dump(
+            [
+                {key: response[key] for key in ("path", "failed", "messages")}
+                for response in results
+            ],
+            args.output,
+            indent=2,
+        )
+
+    sys.exit(exit_code.value)
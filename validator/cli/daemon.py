@@ -0,0 +1,82 @@
+"""
+script to run the validation server
+"""
+
+import argparse as ap
+import io
+import signal
+import sys
+
+from validator.cli.main import DEFAULT_SCHEMA
+from validator.core.cache import ContributionCache
+from validator.core.daemon import ValidationServer
+from validator.core.protocol import DEFAULT_ADDRESS, is_local, parse_address
+from validator.core.results import ResultStore
+from validator.model.schema import Schema
+
+
+def create_parser(name: str, desc: str) -> ap.ArgumentParser:
+    """
+    create CLI argument parser
+    """
+    parser = ap.ArgumentParser(name, description=desc)
+    parser.add_argument(
+        "-a",
+        "--address",
+        default=DEFAULT_ADDRESS,
+        help="unix socket path, or [host]:port on localhost to listen on (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-s",
+        "--schema",
+        metavar="SCHEMA",
+        type=ap.FileType("rb"),
+        default=io.BytesIO(DEFAULT_SCHEMA),
+        help="IMBIE validation schema file (will use default if omitted)",
+    )
+    parser.add_argument(
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=4,
+        help="maximum number of files to validate at once",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only check series which have changed since they were last validated",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always parse data files, rather than using previously parsed copies",
+    )
+    return parser
+
+
+def main() -> None:
+    parser = create_parser(__name__, "IMBIE3 validation server")
+    args = parser.parse_args()
+
+    address = parse_address(args.address)
+    if not is_local(address):
+        parser.error(f"can only listen on localhost, not {args.address}")
+
+    with args.schema as schema:
+        schemas = Schema.read_all(schema)
+
+    server = ValidationServer(
+        schemas,
+        max_jobs=args.jobs,
+        cache=None if args.no_cache else ContributionCache(),
+        results=ResultStore() if args.incremental else None,
+    )
+
+    # stop cleanly when a service manager asks
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    sys.stderr.write(f"listening on {args.address}\n")
+    try:
+        server.serve(address)
+    except KeyboardInterrupt:
+        pass
@@ -1,16 +1,23 @@
 import argparse as ap
-import shutil
+import os
 import sys
 import pkgutil
 import io
 import json
-import tempfile
+from typing import Iterable
 
 from validator.const.severity import ExitCode, Severity
-from validator.core.unpack import unpack
-
+from validator.core.batch import (
+    FileReport,
+    find_submissions,
+    validate_batch,
+    validate_submission,
+)
+from validator.core.cache import ContributionCache
+from validator.core.results import ResultStore
+
+from validator.model.message import Message
 from validator.model.schema import Schema
-from validator.core.validate import validate_file
 
 DEFAULT_SCHEMA = pkgutil.get_data("validator.data", "schema.yml")
 
@@ -23,8 +30,9 @@ def create_parser(name: str, description: str) -> ap.ArgumentParser:
     p.add_argument(
         "input",
         metavar="DATA_FILE",
-        type=ap.FileType("rb"),
-        help="CSV contribution file to validate",
+        type=str,
+        help="CSV contribution file or JSON submission to validate, or a "
+        "directory or glob pattern of files to validate in batch mode",
     )
     p.add_argument(
         "-f",
@@ -49,52 +57,143 @@ def create_parser(name: str, description: str) -> ap.ArgumentParser:
         metavar="OUTPUT_PATH",
         help="location to save output data",
     )
-    p.add_argument("-j", "--json", action="store_true", help="JSON format output")
+    output_format = p.add_mutually_exclusive_group()
+    output_format.add_argument(
+        "-j", "--json", action="store_true", help="JSON format output"
+    )
+    output_format.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="JSON lines output, writing each message as soon as it is found",
+    )
+    p.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="stop at the first error",
+    )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="read data files in chunks, checking each series as it is read",
+    )
+    p.add_argument(
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="number of files to validate in parallel in batch mode",
+    )
+    p.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only check series which have changed since they were last validated",
+    )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always parse data files, rather than using previously parsed copies",
+    )
     return p
 
 
+def write_message(
+    args: ap.Namespace, filename: str, message: Message, **fields: str
+) -> None:
+    """
+    write one message in the selected output format
+    """
+    if args.jsonl:
+        line = json.dumps({**fields, "file": filename, **message.to_json()})
+        print(line, file=args.output, flush=True)
+    elif not args.json:
+        print(f"title: {message.title}", file=args.output)
+        print(f"severity: {message.severity}", file=args.output)
+        print(f"description: {message.description}", file=args.output)
+
+
 def main() -> None:
     parser = create_parser(__name__, "IMBIE3 validation tool")
     args = parser.parse_args()
 
-    exit_code = ExitCode.ok
+    with args.schema as schema:
+        schemas = Schema.read_all(schema)
 
-    _dir = None
+    cache = None if args.no_cache else ContributionCache()
+    results = ResultStore() if args.incremental else None
+    options = dict(
+        streaming=args.stream, cache=cache, results=results, fail_fast=args.fail_fast
+    )
 
-    if args.input.name.endswith(".json"):
-        _dir = tempfile.mkdtemp()
-        items = list(unpack(args.input.name, _dir))
+    batch = find_submissions(args.input, args.format)
+    if batch is not None:
+        reports = validate_batch(batch, args.format, schemas, jobs=args.jobs, **options)
+        sys.exit(write_batch(args, reports).value)
 
-        inputs = [item.filename for item in items]
-        formats = [item.format_name for item in items]
-        sys.stderr.writelines("\n".join(inputs) + "\n")
+    if not os.path.isfile(args.input):
+        parser.error(f"no such file: {args.input}")
+    if args.format is None and not args.input.endswith(".json"):
+        parser.error("a format is required to validate a data file")
 
-    else:
-        inputs = [args.input]
-        formats = [args.format]
+    exit_code = ExitCode.ok
+    messages = validate_submission(args.input, args.format, schemas, **options)
 
-    with args.schema as schema:
-        schemas = Schema.read_all(schema)
+    try:
+        if args.json:
+            messages = list(messages)
+            json.dump([m.to_json() for _, m in messages], args.output, indent=2)
 
-    for item, fmt in zip(inputs, formats):
-        if format is None:
-            continue
-        schema = schemas[fmt]
-        with open(item) as infile:
-            messages = list(validate_file(infile, schema))
-        for message in messages:
+        for filename, message in messages:
             if message.severity == Severity.error:
                 exit_code = ExitCode.validation_failed
+            write_message(args, filename, message)
+    except ValueError as e:
+        # a submission which is not valid JSON
+        sys.stderr.write(f"{e}\n")
+        sys.exit(-1)
 
-        if args.json:
-            json.dump([m.to_json() for m in messages], args.output, indent=2)
-        else:
-            for message in messages:
-                print(f"title: {message.title}", file=args.output)
-                print(f"severity: {message.severity}", file=args.output)
-                print(f"description: {message.description}", file=args.output)
+    sys.exit(exit_code.value)
 
-    if _dir is not None:
-        shutil.rmtree(_dir)
 
-    sys.exit(exit_code.value)
+def write_batch(args: ap.Namespace, reports: Iterable[FileReport]) -> ExitCode:
+    """
+    write the results of batch mode: every message for JSON lines
+    output, otherwise a summary of each file. returns the combined
+    exit code
+    """
+    exit_code = ExitCode.ok
+    results = []
+    num_failed = 0
+
+    for report in reports:
+        if report.failed:
+            exit_code = ExitCode.validation_failed
+            num_failed += 1
+
+        if args.json:
+            results.append(
+                {
+                    "submission": report.path,
+                    "failed": report.failed,
+                    "messages": [
+                        {"file": filename, **message.to_json()}
+                        for filename, message in report.messages
+                    ],
+                }
+            )
+        elif args.jsonl:
+            for filename, message in report.messages:
+                write_message(args, filename, message, submission=report.path)
+        else:
+            status = "FAILED" if report.failed else "ok"
+            print(
+                f"{report.path}: {status} ({report.count(Severity.error)} errors, "
+                f"{report.count(Severity.warning)} warnings)",
+                file=args.output,
+                flush=True,
+            )
+
+    if args.json:
+        summary = {"failed": num_failed, "total": len(results), "files": results}
+        json.dump(summary, args.output, indent=2)
+
+    return exit_code
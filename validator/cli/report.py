@@ -1,13 +1,13 @@
 import argparse as ap
 import io
 import os
-import tempfile
 import pdfkit
 import sys
 
 from validator.cli.main import DEFAULT_SCHEMA
 
-from validator.core.unpack import from_directory, unpack
+from validator.core.cache import ContributionCache
+from validator.core.unpack import from_directory, unpack_buffers
 from validator.model.contribution import Contribution, FormatError
 from validator.model.schema import Schema
 from validator.report.report import render_report
@@ -49,6 +49,11 @@ def create_parser(name: str, desc: str) -> ap.ArgumentParser:
         default=io.BytesIO(DEFAULT_SCHEMA),
         help="validation schema file",
     )
+    group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always parse data files, rather than using previously parsed copies",
+    )
 
     return parser
 
@@ -65,10 +70,16 @@ def main() -> None:
         print(f"generating report: '{args.input}'")
 
     if os.path.isfile(args.input):
-        root_path = tempfile.mkdtemp()
-        items = unpack(args.input, root_path, data_only=True)
+        # uploads are read from memory, without unpacking them to disk
+        try:
+            items = unpack_buffers(args.input, data_only=True)
+        except ValueError as e:
+            sys.stderr.write(f"{e}\n")
+            sys.exit(-1)
     else:
-        items = from_directory(args.input, data_only=True)
+        items = [
+            (item, item.filename) for item in from_directory(args.input, data_only=True)
+        ]
 
     outpath = args.output
     if outpath is not None and os.path.isdir(args.output):
@@ -76,19 +87,32 @@ def main() -> None:
         name = os.path.basename(name)
         outpath = os.path.join(args.output, name + "." + args.format)
 
-    contribs: list[Contribution] = []
+    if args.no_cache:
+        load = Contribution.from_file
+    else:
+        load = ContributionCache().load
 
-    for item in items:
-        data_path = item.filename
+    contribs: list[Contribution] = []
 
+    for item, source in items:
         try:
-            contribution = Contribution.from_file(data_path, schemas[item.format_name])
-        except (FormatError, ValueError) as e:
-            sys.stderr.write(f"cannot parse file: {data_path}\n")
-            sys.stderr.write(str(e) + "\n")
-            sys.exit(-1)
-
-        contribs.append(contribution)
+            data_path = item.filename
+            if item.format_name not in schemas:
+                # only tabular uploads are included in reports
+                continue
+
+            try:
+                contribution = load(source, schemas[item.format_name])
+            except (FormatError, ValueError) as e:
+                sys.stderr.write(f"cannot parse file: {data_path}\n")
+                sys.stderr.write(str(e) + "\n")
+                sys.exit(-1)
+
+            contribs.append(contribution)
+        finally:
+            # the contribution holds its own copy of the data
+            if not isinstance(source, str):
+                source.close()
 
     base, *others = contribs
     contribution = base.join(*others)
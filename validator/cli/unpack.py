@@ -3,6 +3,7 @@ script to unpack JSON submission document
 """
 import argparse as ap
 import os
+import sys
 
 from validator.core.unpack import unpack
 
@@ -42,5 +43,11 @@ def main() -> None:
     parser = create_parser(__name__, "IMBIE3 submission unpacker")
     args = parser.parse_args()
 
-    for output in unpack(args.input.name, args.out, strip=args.strip_data):
+    try:
+        outputs = unpack(args.input.name, args.out, strip=args.strip_data)
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        sys.exit(-1)
+
+    for output in outputs:
         print(f"unpacked {output.fieldname}, created {output.filename}")
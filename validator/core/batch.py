@@ -0,0 +1,192 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+import glob
+import os
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from validator.const.severity import Severity
+from validator.core.cache import ContributionCache
+from validator.core.results import ResultStore
+from validator.core.gridded import GRIDDED_FORMAT
+from validator.core.unpack import unpack_buffers
+from validator.core.validate import until_error, validate_file, validate_gridded_file
+from validator.model.message import Message
+from validator.model.schema import Schema
+
+
+@dataclass(frozen=True)
+class FileReport:
+    """
+    result of validating one data file or submission
+    """
+
+    path: str
+    # messages, each with the data file it refers to
+    messages: List[Tuple[str, Message]]
+
+    @property
+    def failed(self) -> bool:
+        return self.count(Severity.error) > 0
+
+    def count(self, severity: Severity) -> int:
+        return sum(message.severity == severity for _, message in self.messages)
+
+
+def validate_input(
+    item: Union[str, BinaryIO],
+    fmt: str,
+    schemas: Dict[str, Schema],
+    streaming: bool = False,
+    cache: ContributionCache = None,
+    results: ResultStore = None,
+    name: str = None,
+    fail_fast: bool = False,
+) -> Iterator[Message]:
+    """
+    run validation checks on a data file, or an unpacked upload. with
+    `fail_fast`, checking stops at the first error
+    """
+    if fmt == GRIDDED_FORMAT:
+        messages = validate_gridded_file(item, name, cache)
+        yield from until_error(messages) if fail_fast else messages
+        return
+
+    infile = open(item, "rb") if isinstance(item, str) else item
+    with infile:
+        yield from validate_file(
+            infile, schemas[fmt], streaming, cache, results, fail_fast
+        )
+
+
+def validate_submission(
+    path: str,
+    fmt: Optional[str],
+    schemas: Dict[str, Schema],
+    *,
+    streaming: bool = False,
+    cache: ContributionCache = None,
+    results: ResultStore = None,
+    fail_fast: bool = False,
+) -> Iterator[Tuple[str, Message]]:
+    """
+    run validation checks on a data file of the given format, or on
+    each upload of a JSON submission. messages are produced as they are
+    found, with the data file they refer to
+    """
+    if not path.endswith(".json"):
+        messages = validate_input(
+            path, fmt, schemas, streaming, cache, results, fail_fast=fail_fast
+        )
+        for message in messages:
+            yield path, message
+        return
+
+    # uploads are validated from memory, without unpacking them to disk
+    uploads = unpack_buffers(path)
+    try:
+        for item, buffer in uploads:
+            if item.format_name is None:
+                continue
+
+            messages = validate_input(
+                buffer,
+                item.format_name,
+                schemas,
+                streaming,
+                cache,
+                results,
+                name=os.path.basename(item.filename),
+                fail_fast=fail_fast,
+            )
+            for message in messages:
+                yield item.filename, message
+                if fail_fast and message.severity == Severity.error:
+                    return
+    finally:
+        for _, buffer in uploads:
+            buffer.close()
+
+
+def check_submission(
+    path: str, fmt: Optional[str], schemas: Dict[str, Schema], **options
+) -> FileReport:
+    """
+    validate a data file or submission, collecting the messages. files
+    which cannot be processed are reported rather than raising
+    """
+    if fmt is None and not path.endswith(".json"):
+        message = Message(
+            Severity.error, "Unknown data format", f"{path}: no format given"
+        )
+        return FileReport(path, [(path, message)])
+
+    messages = []
+    try:
+        for item in validate_submission(path, fmt, schemas, **options):
+            messages.append(item)
+    except Exception as e:
+        message = Message(Severity.error, "Could not validate submission", repr(e))
+        messages.append((path, message))
+    return FileReport(path, messages)
+
+
+def find_submissions(pattern: str, fmt: str = None) -> Optional[List[str]]:
+    """
+    find the files to validate in batch mode: the JSON submissions in a
+    directory (and data files, if a format is given), or the files
+    matching a glob pattern. returns None for a single file
+    """
+    if os.path.isdir(pattern):
+        extensions = (".json", ".csv") if fmt is not None else (".json",)
+        return [
+            os.path.join(pattern, name)
+            for name in sorted(os.listdir(pattern))
+            if name.endswith(extensions)
+        ]
+    if glob.has_magic(pattern):
+        return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return None
+
+
+def validate_batch(
+    paths: Sequence[str],
+    fmt: Optional[str],
+    schemas: Dict[str, Schema],
+    *,
+    jobs: int = None,
+    fail_fast: bool = False,
+    **options,
+) -> Iterator[FileReport]:
+    """
+    validate many files, in a pool of worker processes if more than one
+    job is requested. reports are produced in the order of the paths.
+    with `fail_fast`, files after the first to fail are not checked
+    """
+    check = partial(
+        check_submission, fmt=fmt, schemas=schemas, fail_fast=fail_fast, **options
+    )
+
+    if jobs is None or jobs <= 1:
+        for path in paths:
+            report = check(path)
+            yield report
+            if fail_fast and report.failed:
+                return
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for report in pool.map(check, paths):
+            yield report
+            if fail_fast and report.failed:
+                pool.shutdown(cancel_futures=True)
+                return
@@ -0,0 +1,320 @@
+from dataclasses import replace
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict, Optional, TextIO, Tuple, Union
+import numpy as np
+
+from validator.const.basins import BasinGroup, IceSheet, RignotBasin, ZwallyBasin
+from validator.const.experiment_groups import ExperimentGroup
+from validator.core.gridded import GRIDDED_FORMAT, HEADER_EXT, RAW_EXT, GriddedData
+from validator.model.columns import ColumnStore
+from validator.model.contribution import Contribution
+from validator.model.schema import Schema
+from validator.model.series import Series
+
+# increase when the stored format changes, to ignore older entries
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "imbie-validator",
+)
+DEFAULT_MAX_SIZE = 1 << 30
+
+BASIN_TYPES = {cls.__name__: cls for cls in (IceSheet, ZwallyBasin, RignotBasin)}
+
+# files of an entry, of a parsed contribution or of converted gridded
+#  data. the file marking an entry complete is removed first
+ENTRY_EXTS = ("json", RAW_EXT[1:] + HEADER_EXT, "npy", RAW_EXT[1:])
+
+
+class ContributionCache:
+    """
+    on-disk cache of parsed contribution files, keyed by the content
+    of the file and the schema used to read it.
+
+    each entry is the data of all series as one .npy block, which is
+    memory-mapped when loaded, with the series metadata in a JSON file
+    beside it. loaded series are in compact (ColumnStore) form. gridded
+    uploads are kept as their converted raw data (see GriddedData). the
+    least recently used entries are removed when the total size of
+    the cache exceeds `max_size` bytes
+    """
+
+    def __init__(
+        self, directory: str = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.directory = directory
+        self.max_size = max_size
+
+    def load(self, source: Union[str, BinaryIO], schema: Schema) -> Contribution:
+        """
+        read a contribution from a data file, using the cached copy
+        if the file has been read before
+        """
+        return self.load_columns(source, schema)[0]
+
+    def load_columns(
+        self, source: Union[str, BinaryIO], schema: Schema
+    ) -> Tuple[Contribution, ColumnStore]:
+        """
+        as load, also giving the data of every series joined end-to-end,
+        of which the data of each series is a slice
+        """
+        key = self.key(_file_digest(source), schema)
+
+        entry = self._read(key)
+        if entry is None:
+            contribution = Contribution.from_file(source, schema, compact=True)
+            entry = contribution, self._write(key, contribution)
+        return entry
+
+    @staticmethod
+    def key(file_digest: str, schema: Schema) -> str:
+        """
+        cache key for a file with the given digest, read with a schema
+        """
+        schema_digest = hashlib.sha256(repr(schema).encode()).hexdigest()
+        return hashlib.sha256(
+            f"{CACHE_VERSION}:{file_digest}:{schema_digest}".encode()
+        ).hexdigest()
+
+    def load_gridded(
+        self, source: Union[str, BinaryIO], name: str = None
+    ) -> GriddedData:
+        """
+        convert a gridded upload to raw storage in the cache, reusing
+        the converted data if the file has been converted before. the
+        name of the source defaults to the name of its file
+        """
+        if name is None and isinstance(source, str):
+            name = os.path.basename(source)
+        key = hashlib.sha256(
+            f"{CACHE_VERSION}:{_file_digest(source)}:{GRIDDED_FORMAT}".encode()
+        ).hexdigest()
+        path = self._path(key, RAW_EXT[1:])
+
+        if os.path.exists(path + HEADER_EXT):
+            try:
+                data = GriddedData.open(path)
+            except (OSError, ValueError, KeyError):
+                # incomplete or damaged entry
+                self._remove(key)
+            else:
+                # mark as recently used
+                os.utime(path + HEADER_EXT)
+                return replace(data, source=name)
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            GriddedData.convert(source, tmp_path, name=name)
+            # the header is moved last, as it marks the entry complete
+            os.replace(tmp_path, path)
+            os.replace(tmp_path + HEADER_EXT, path + HEADER_EXT)
+        finally:
+            for leftover in (tmp_path, tmp_path + HEADER_EXT):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+        self._evict()
+        return GriddedData.open(path)
+
+    def clear(self) -> None:
+        """
+        remove all entries
+        """
+        for key in self._entries():
+            self._remove(key)
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def _read(self, key: str) -> Optional[Tuple[Contribution, ColumnStore]]:
+        meta_path = self._path(key, "json")
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["series"]:
+                block = np.load(self._path(key, "npy"), mmap_mode="r")
+            else:
+                block = np.empty((len(meta["names"]), 0))
+            contribution = _from_meta(meta, block)
+        except (OSError, ValueError, KeyError):
+            # incomplete or damaged entry
+            self._remove(key)
+            return None
+
+        # mark as recently used
+        os.utime(meta_path)
+        return contribution, ColumnStore(meta["names"], block)
+
+    def _write(self, key: str, contribution: Contribution) -> ColumnStore:
+        """
+        store a compact contribution, and return the joined data of its
+        series
+        """
+        series = contribution.series
+        if series:
+            block = np.concatenate([s.data.block for s in series], axis=1)
+            columns = ColumnStore(series[0].columns, block)
+        else:
+            block = None
+            columns = ColumnStore([], np.empty((0, 0)))
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # the metadata is written last, as it marks the entry complete
+            if block is not None:
+                self._replace(key, "npy", lambda f: np.save(f, block))
+            meta = json.dumps(_to_meta(contribution)).encode()
+            self._replace(key, "json", lambda f: f.write(meta))
+        except OSError:
+            # caching is optional, carry on without it
+            return columns
+
+        self._evict()
+        return columns
+
+    def _replace(self, key: str, ext: str, write: Any) -> None:
+        """
+        write a file of an entry atomically
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, self._path(key, ext))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _entries(self) -> Dict[str, float]:
+        """
+        time of last use of every complete entry
+        """
+        if not os.path.isdir(self.directory):
+            return {}
+        # the metadata (or gridded header) of an entry is its last file
+        return {
+            entry.name.split(".", 1)[0]: entry.stat().st_mtime
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".json") and not entry.name.endswith(".tmp.json")
+        }
+
+    def _size(self, key: str) -> int:
+        size = 0
+        for ext in ENTRY_EXTS:
+            try:
+                size += os.path.getsize(self._path(key, ext))
+            except OSError:
+                pass
+        return size
+
+    def _remove(self, key: str) -> None:
+        for ext in ENTRY_EXTS:
+            try:
+                os.remove(self._path(key, ext))
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        """
+        remove least recently used entries until the cache fits
+        """
+        entries = self._entries()
+        sizes = {key: self._size(key) for key in entries}
+        total = sum(sizes.values())
+
+        for key in sorted(entries, key=entries.get):
+            if total <= self.max_size:
+                break
+            self._remove(key)
+            total -= sizes[key]
+
+
+def _to_meta(contribution: Contribution) -> Dict[str, Any]:
+    """
+    describe a compact contribution, apart from its data block
+    """
+    series = contribution.series
+    return {
+        "version": CACHE_VERSION,
+        "username": str(contribution.username),
+        "experiment_group": contribution.experiment_group.name,
+        "names": list(series[0].columns) if series else [],
+        "series": [
+            {
+                "length": s.num_records,
+                "data_format": s.data_format,
+                "contributor": str(s.contributor),
+                "experiment_group": s.experiment_group.name,
+                "basin_group": s.basin_group.name,
+                "basin_id": [type(s.basin_id).__name__, s.basin_id.name],
+                "computed": s.computed,
+            }
+            for s in series
+        ],
+    }
+
+
+def _from_meta(meta: Dict[str, Any], block: np.ndarray) -> Contribution:
+    """
+    create a contribution from its description and data block
+    """
+    if meta["version"] != CACHE_VERSION:
+        raise ValueError(f"unsupported cache version: {meta['version']}")
+
+    series = []
+    start = 0
+    for entry in meta["series"]:
+        stop = start + entry["length"]
+        basin_type, basin_name = entry["basin_id"]
+
+        series.append(
+            Series(
+                ColumnStore(meta["names"], block[:, start:stop]),
+                entry["data_format"],
+                entry["contributor"],
+                ExperimentGroup[entry["experiment_group"]],
+                BASIN_TYPES[basin_type][basin_name],
+                BasinGroup[entry["basin_group"]],
+                computed=entry["computed"],
+            )
+        )
+        start = stop
+
+    return Contribution(
+        meta["username"], ExperimentGroup[meta["experiment_group"]], series
+    )
+
+
+def _file_digest(source: Union[str, BinaryIO]) -> str:
+    """
+    digest of the content of a file
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            _hash_blocks(digest, f)
+    else:
+        _hash_blocks(digest, source)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+def _hash_blocks(digest: Any, f: Union[BinaryIO, TextIO]) -> None:
+    """
+    add the content of a file to a digest, a block at a time
+    """
+    while True:
+        block = f.read(1 << 20)
+        if not block:
+            return
+        digest.update(block.encode() if isinstance(block, str) else block)
@@ -0,0 +1,127 @@
+import json
+import os
+import socketserver
+import threading
+from typing import Any, Dict
+
+from validator.core.batch import check_submission
+from validator.core.cache import ContributionCache
+from validator.core.protocol import Address, connect, is_local
+from validator.core.results import ResultStore
+from validator.model.schema import Schema
+
+
+class ValidationServer:
+    """
+    validates files for clients of a local socket server (see
+    core.protocol). schemas, their validation plans and all imports are
+    loaded once, and at most `max_jobs` requests are validated at a time.
+
+    requests name files on the server's machine, so it only listens on
+    a unix socket or on localhost
+    """
+
+    def __init__(
+        self,
+        schemas: Dict[str, Schema],
+        *,
+        max_jobs: int = 4,
+        cache: ContributionCache = None,
+        results: ResultStore = None,
+    ) -> None:
+        self.schemas = schemas
+        self.cache = cache
+        self.results = results
+        self._slots = threading.BoundedSemaphore(max_jobs)
+
+        for schema in schemas.values():
+            schema.validation_plan
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        validate the file of one request
+        """
+        path = request.get("path")
+        if not isinstance(path, str):
+            return {"ok": False, "error": "request has no path"}
+
+        with self._slots:
+            report = check_submission(
+                path,
+                request.get("format"),
+                self.schemas,
+                streaming=bool(request.get("stream", False)),
+                cache=self.cache,
+                results=self.results,
+                fail_fast=bool(request.get("fail_fast", False)),
+            )
+
+        return {
+            "ok": True,
+            "path": report.path,
+            "failed": report.failed,
+            "messages": [
+                {"file": filename, **message.to_json()}
+                for filename, message in report.messages
+            ],
+        }
+
+    def serve(self, address: Address) -> None:
+        """
+        accept connections until interrupted
+        """
+        server = _make_server(address)
+        server.validation = self
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if isinstance(address, str) and os.path.exists(address):
+                os.remove(address)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.validation.handle(json.loads(line))
+            except Exception as e:
+                response = {"ok": False, "error": repr(e)}
+
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+def _make_server(address: Address) -> socketserver.BaseServer:
+    """
+    create a threaded server for a unix socket path or a TCP address
+    on localhost
+    """
+    if not is_local(address):
+        raise ValueError(f"the server can only listen on localhost, not {address}")
+
+    if not isinstance(address, str):
+
+        class TCPServer(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        return TCPServer(address, _RequestHandler)
+
+    if os.path.exists(address):
+        # remove the socket of a server which is no longer running
+        try:
+            connect(address).close()
+        except OSError:
+            os.remove(address)
+        else:
+            raise RuntimeError(f"a server is already listening at {address}")
+
+    class UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    server = UnixServer(address, _RequestHandler)
+    os.chmod(address, 0o600)
+    return server
@@ -0,0 +1,222 @@
+from dataclasses import dataclass
+import json
+import os
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from validator.model.contribution import FormatError
+
+# format of uploads too large to be read into memory
+GRIDDED_FORMAT = "gridded"
+
+# extensions of the converted data, and of its header
+RAW_EXT = ".raw"
+HEADER_EXT = ".json"
+
+SLICE_ROWS = 100_000
+
+
+@dataclass(frozen=True)
+class GriddedStatistics:
+    """
+    statistics of each column of gridded data, over finite values
+    """
+
+    num_values: np.ndarray
+    num_missing: int
+    minimum: np.ndarray
+    maximum: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+
+
+@dataclass(frozen=True)
+class GriddedData:
+    """
+    numeric table from a gridded upload, stored on disk as a raw
+    (rows x columns) array and accessed through a memory map
+    """
+
+    path: str
+    shape: Tuple[int, int]
+    dtype: str
+    source: str = None
+
+    @property
+    def header_path(self) -> str:
+        return self.path + HEADER_EXT
+
+    @property
+    def num_rows(self) -> int:
+        return self.shape[0]
+
+    @property
+    def num_columns(self) -> int:
+        return self.shape[1]
+
+    @classmethod
+    def convert(
+        cls,
+        source: Union[str, BinaryIO],
+        path: str,
+        *,
+        name: str = None,
+        chunksize: int = SLICE_ROWS,
+        dtype: np.dtype = np.float64,
+    ) -> "GriddedData":
+        """
+        convert a comma or whitespace separated text file, or binary
+        file object, to raw storage. the file is read in chunks of rows,
+        so that it is never held in memory as a whole. the name of the
+        source defaults to the name of its file
+        """
+        if name is None and isinstance(source, str):
+            name = os.path.basename(source)
+        dtype = np.dtype(dtype)
+        num_rows = 0
+        num_columns = None
+
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as out:
+                for chunk in _read_chunks(source, chunksize, dtype):
+                    if num_columns is None:
+                        num_columns = chunk.shape[1]
+                    elif chunk.shape[1] != num_columns:
+                        raise FormatError(
+                            f"expected {num_columns} columns, found {chunk.shape[1]}"
+                        )
+                    out.write(np.ascontiguousarray(chunk, dtype=dtype).tobytes())
+                    num_rows += chunk.shape[0]
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        data = cls(path, (num_rows, num_columns or 0), dtype.str, name)
+        # the header is written last, as it marks the conversion complete
+        with open(data.header_path, "w") as f:
+            json.dump(
+                {
+                    "shape": list(data.shape),
+                    "dtype": data.dtype,
+                    "source": data.source,
+                },
+                f,
+            )
+        return data
+
+    @classmethod
+    def open(cls, path: str) -> "GriddedData":
+        """
+        open previously converted data
+        """
+        with open(path + HEADER_EXT) as f:
+            header = json.load(f)
+        return cls(path, tuple(header["shape"]), header["dtype"], header.get("source"))
+
+    def array(self) -> np.ndarray:
+        """
+        read-only memory map of the whole array
+        """
+        if not self.num_rows:
+            return np.empty(self.shape, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode="r", shape=self.shape)
+
+    def iter_slices(self, rows: int = SLICE_ROWS) -> Iterator[np.ndarray]:
+        """
+        iterate over blocks of consecutive rows
+        """
+        array = self.array()
+        for start in range(0, self.num_rows, rows):
+            yield array[start : start + rows]
+
+    def get_statistics(self, rows: int = SLICE_ROWS) -> GriddedStatistics:
+        """
+        calculate statistics one slice at a time, combining the
+        mean and variance of each slice as they are read
+        """
+        count = np.zeros(self.num_columns)
+        mean = np.zeros(self.num_columns)
+        m2 = np.zeros(self.num_columns)
+        minimum = np.full(self.num_columns, np.inf)
+        maximum = np.full(self.num_columns, -np.inf)
+        num_missing = 0
+
+        for block in self.iter_slices(rows):
+            finite = np.isfinite(block)
+            num_missing += block.size - np.count_nonzero(finite)
+
+            n = np.count_nonzero(finite, axis=0)
+            block_mean = np.where(finite, block, 0).sum(axis=0) / np.maximum(n, 1)
+            deviation = np.where(finite, block - block_mean, 0)
+            block_m2 = (deviation**2).sum(axis=0)
+
+            minimum = np.minimum(minimum, np.where(finite, block, np.inf).min(axis=0))
+            maximum = np.maximum(maximum, np.where(finite, block, -np.inf).max(axis=0))
+
+            total = count + n
+            delta = block_mean - mean
+            mean = mean + delta * n / np.maximum(total, 1)
+            m2 = m2 + block_m2 + delta**2 * count * n / np.maximum(total, 1)
+            count = total
+
+        empty = count == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(m2 / count)
+
+        return GriddedStatistics(
+            count.astype(np.int64),
+            int(num_missing),
+            np.where(empty, np.nan, minimum),
+            np.where(empty, np.nan, maximum),
+            np.where(empty, np.nan, mean),
+            np.where(empty, np.nan, std),
+        )
+
+
+def _read_chunks(
+    source: Union[str, BinaryIO], chunksize: int, dtype: np.dtype
+) -> Iterator[np.ndarray]:
+    """
+    read a numeric text file, or binary file object, in blocks of rows
+    """
+    # use commas if the first line of data has them, whitespace otherwise
+    if isinstance(source, str):
+        with open(source) as f:
+            delimiter = _find_delimiter(f)
+    else:
+        delimiter = _find_delimiter(line.decode() for line in source)
+        source.seek(0)
+    if delimiter is None:
+        # no data
+        return
+
+    options = dict(skipinitialspace=True) if delimiter == "," else {}
+    try:
+        reader = pd.read_csv(
+            source,
+            sep=delimiter,
+            header=None,
+            comment="#",
+            dtype=dtype,
+            chunksize=chunksize,
+            **options,
+        )
+        for chunk in reader:
+            yield chunk.to_numpy(dtype=dtype)
+    except (ValueError, pd.errors.ParserError) as e:
+        raise FormatError(f"could not read gridded data: {e}") from e
+
+
+def _find_delimiter(lines: Iterable[str]) -> Optional[str]:
+    """
+    delimiter of the first line of data, or None if there is no data
+    """
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            return "," if "," in line else r"\s+"
+    return None
@@ -0,0 +1,211 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+from validator.const.severity import Severity
+from validator.model.message import Message
+from validator.model.schema import ColumnRule, Schema
+from validator.model.series import Series
+
+INTERVAL_TOLERANCE = 1e-4
+
+
+@dataclass(frozen=True)
+class SeriesLayout:
+    """
+    positions of the records of several series, joined end-to-end
+    """
+
+    lengths: np.ndarray
+    # series of each record
+    series_idx: np.ndarray
+    # consecutive records which are part of the same series,
+    #  and the series of each such pair
+    same_series: np.ndarray
+    pair_idx: np.ndarray
+    # first record of each series (clipped for empty series at the end)
+    first: np.ndarray
+
+    @classmethod
+    def from_lengths(cls, lengths: np.ndarray) -> "SeriesLayout":
+        lengths = np.asarray(lengths, dtype=np.intp)
+        series_idx = np.repeat(np.arange(lengths.size), lengths)
+        same_series = series_idx[1:] == series_idx[:-1]
+        first = np.minimum(np.cumsum(lengths) - lengths, max(series_idx.size - 1, 0))
+        return cls(lengths, series_idx, same_series, series_idx[1:][same_series], first)
+
+    @classmethod
+    def from_bounds(cls, starts: np.ndarray, stops: np.ndarray) -> "SeriesLayout":
+        """
+        layout of series which are the contiguous [start, stop) slices
+        of one set of records, as found by group_rows
+        """
+        return cls.from_lengths(np.asarray(stops) - np.asarray(starts))
+
+    @property
+    def num_series(self) -> int:
+        return self.lengths.size
+
+    @property
+    def num_records(self) -> int:
+        return self.series_idx.size
+
+    def any(self, record_idx: np.ndarray) -> np.ndarray:
+        """
+        find the series which contain any of the given records
+        """
+        return np.bincount(record_idx, minlength=self.num_series) > 0
+
+
+@dataclass(frozen=True)
+class Check(ABC):
+    """
+    validation rule applied to one column of every series
+    """
+
+    column: str
+
+    @abstractmethod
+    def run(self, layout: SeriesLayout, values: np.ndarray) -> np.ndarray:
+        """
+        find the series which fail the check, given the
+        values of the column for all series joined end-to-end
+        """
+
+    @abstractmethod
+    def message(self, series: Series) -> Message:
+        """
+        the message of a series which fails the check
+        """
+
+
+@dataclass(frozen=True)
+class IntervalCheck(Check):
+    """
+    consecutive values must be separated by the interval
+    """
+
+    interval: float
+    tolerance: float = INTERVAL_TOLERANCE
+
+    @classmethod
+    def for_column(cls, column: ColumnRule) -> Optional["IntervalCheck"]:
+        if column.interval is None:
+            return None
+        return cls(column.name, column.interval)
+
+    def run(self, layout: SeriesLayout, values: np.ndarray) -> np.ndarray:
+        errors = np.abs(np.diff(values)[layout.same_series] - self.interval)
+        return layout.any(layout.pair_idx[errors > self.tolerance])
+
+    def message(self, series: Series) -> Message:
+        return Message(
+            Severity.error,
+            "Invalid data interval",
+            f'{series}: Column "{self.column}" does not match expected interval: {self.interval}',
+        )
+
+
+@dataclass(frozen=True)
+class UniqueCheck(Check):
+    """
+    the column must have a single value in each series
+    """
+
+    @classmethod
+    def for_column(cls, column: ColumnRule) -> Optional["UniqueCheck"]:
+        if not column.unique:
+            return None
+        return cls(column.name)
+
+    def run(self, layout: SeriesLayout, values: np.ndarray) -> np.ndarray:
+        # every value must equal the first of its series,
+        #  with NaNs counted as the same value
+        expected = values[layout.first][layout.series_idx]
+        differs = (values != expected) & ~(np.isnan(values) & np.isnan(expected))
+        return layout.any(layout.series_idx[differs])
+
+    def message(self, series: Series) -> Message:
+        return Message(
+            Severity.error,
+            "Multiple values in unique column",
+            f'{series}: Column "{self.column}" expects a single value per series',
+        )
+
+
+# create the check of each kind for a column, if its rule needs one.
+#  checks of a column run in this order
+RULES: List[Callable[[ColumnRule], Optional[Check]]] = [
+    IntervalCheck.for_column,
+    UniqueCheck.for_column,
+]
+
+
+@dataclass(frozen=True)
+class ValidationPlan:
+    """
+    ordered checks for the data columns of a schema
+    """
+
+    checks: Tuple[Check, ...]
+
+    @classmethod
+    def compile(cls, schema: Schema) -> "ValidationPlan":
+        checks = []
+        for column in schema.get_data_columns():
+            for rule in RULES:
+                check = rule(column)
+                if check is not None:
+                    checks.append(check)
+        return cls(tuple(checks))
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        names of the columns used by the checks
+        """
+        return list(dict.fromkeys(check.column for check in self.checks))
+
+    def run(self, series: Iterable[Series]) -> Iterator[Message]:
+        """
+        run all checks on several series at once. messages are ordered
+        by series, then by check
+        """
+        for _, message in self.check(series):
+            yield message
+
+    def check(self, series: Iterable[Series]) -> Iterator[Tuple[int, Message]]:
+        """
+        as run, producing each message with the index of its series
+        """
+        series = list(series)
+        layout = SeriesLayout.from_lengths([s.num_records for s in series])
+        if not layout.num_records or not self.checks:
+            return
+
+        values: Dict[str, np.ndarray] = {
+            name: np.concatenate([s.column(name) for s in series])
+            for name in self.columns
+        }
+        yield from self.check_columns(layout, values, series.__getitem__)
+
+    def check_columns(
+        self,
+        layout: SeriesLayout,
+        values: Dict[str, np.ndarray],
+        get_series: Callable[[int], Series],
+    ) -> Iterator[Tuple[int, Message]]:
+        """
+        as check, given the columns of all series joined end-to-end.
+        only the series which fail a check are created, by get_series
+        """
+        if not layout.num_records:
+            return
+
+        failed = np.zeros((layout.num_series, len(self.checks)), dtype=bool)
+        for k, check in enumerate(self.checks):
+            failed[:, k] = check.run(layout, values[check.column])
+
+        for i, k in zip(*np.nonzero(failed)):
+            yield int(i), self.checks[k].message(get_series(int(i)))
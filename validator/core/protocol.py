@@ -0,0 +1,79 @@
+"""
+protocol of the validation server: one JSON object per line in each
+direction, over a unix socket or a localhost TCP connection.
+
+requests are {"path": ..., "format": ..., "stream": ..., "fail_fast": ...},
+where only the path is required. responses are {"ok": true, "path": ...,
+"failed": ..., "messages": [...]}, or {"ok": false, "error": ...}
+
+this module only uses the standard library, so that clients start quickly
+"""
+import ipaddress
+import json
+import os
+import socket
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, Tuple, Union
+
+DEFAULT_ADDRESS = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir()), "imbie-validator.sock"
+)
+
+Address = Union[str, Tuple[str, int]]
+
+
+def parse_address(address: str) -> Address:
+    """
+    parse "[host]:port" as a TCP address (on localhost by default),
+    and anything else as the path of a unix socket
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and os.sep not in address:
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+def is_local(address: Address) -> bool:
+    """
+    whether an address can only be reached from this machine: a unix
+    socket, or a TCP address on a loopback interface
+    """
+    if isinstance(address, str):
+        return True
+    host = address[0]
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def connect(address: Address, timeout: float = None) -> socket.socket:
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def send_requests(
+    address: Address, requests: Iterable[Dict[str, Any]], timeout: float = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    send requests to the server one at a time over a single
+    connection, producing each response as it arrives
+    """
+    with connect(address, timeout) as sock, sock.makefile("rwb") as stream:
+        for request in requests:
+            stream.write(json.dumps(request).encode() + b"\n")
+            stream.flush()
+
+            line = stream.readline()
+            if not line:
+                raise ConnectionError("connection closed by validation server")
+            yield json.loads(line)
@@ -0,0 +1,85 @@
+from contextlib import closing
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List
+
+from validator.core.cache import DEFAULT_CACHE_DIR
+from validator.model.message import Message
+from validator.model.schema import Schema
+from validator.model.series import Series
+
+DEFAULT_RESULTS_PATH = os.path.join(DEFAULT_CACHE_DIR, "results.sqlite")
+
+
+class ResultStore:
+    """
+    local store of the validation messages of each series, keyed by a
+    digest of the series' contents and of the checks run on it. series
+    which have not changed since they were last validated need not be
+    checked again
+    """
+
+    def __init__(self, path: str = DEFAULT_RESULTS_PATH) -> None:
+        self.path = path
+
+    @staticmethod
+    def key(series: Series, schema: Schema) -> str:
+        """
+        key of the results of validating a series with a schema
+        """
+        plan = repr(schema.validation_plan)
+        return hashlib.sha256(f"{plan}:{series.digest()}".encode()).hexdigest()
+
+    def get(self, keys: Iterable[str]) -> Dict[str, List[Message]]:
+        """
+        find stored messages, for those keys which have them
+        """
+        keys = list(keys)
+        if not keys or not os.path.exists(self.path):
+            return {}
+
+        found = {}
+        with closing(self._connect()) as db:
+            # query in batches, below sqlite's limit on parameters
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                rows = db.execute(
+                    f"SELECT key, messages FROM results WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                )
+                for key, messages in rows:
+                    found[key] = [Message.from_json(m) for m in json.loads(messages)]
+        return found
+
+    def put(self, results: Dict[str, List[Message]]) -> None:
+        """
+        store the messages of each key
+        """
+        if not results:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.executemany(
+                "INSERT OR REPLACE INTO results (key, messages) VALUES (?, ?)",
+                [
+                    (key, json.dumps([m.to_json() for m in messages]))
+                    for key, messages in results.items()
+                ],
+            )
+
+    def clear(self) -> None:
+        """
+        remove all stored results
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, messages TEXT)"
+        )
+        return db
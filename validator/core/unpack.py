@@ -1,12 +1,12 @@
-import base64
 from dataclasses import dataclass
 from fnmatch import fnmatch
 import json
 import os
-import sys
-from typing import Any, Dict, List
+import tempfile
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 
 from validator.const.experiment_groups import ExperimentGroup
+from validator.helpers.json_stream import DataURL, dump_json, load_json
 
 UPLOADS = {
     ExperimentGroup.GMB: [
@@ -49,6 +49,10 @@ UPLOADS = {
     ],
 }
 
+# uploads larger than this are spilled to temporary files when unpacking
+#  to buffers, rather than being held in memory
+MAX_BUFFER_SIZE = 64 << 20
+
 FORMATS = {
     "time-series-upload": "dm",
     "mass-rate-upload": "dmdt",
@@ -62,6 +66,10 @@ FORMATS = {
     # "discrete-rates-flux-gates-upload": "iom-dmdt",
     "discrete-rates-total-mass-change-upload": "dmdt",
     "time-series-accumulation-upload": "dmdt",
+    # gridded uploads are checked without a schema
+    "gridded-mass-balance-data": "gridded",
+    "uplift-rates-data": "gridded",
+    "stokes-coefficients-data": "gridded",
 }
 
 
@@ -72,11 +80,11 @@ class UnpackingRecord:
     group: ExperimentGroup
 
     @property
-    def format_name(self) -> str:
+    def format_name(self) -> Optional[str]:
         """
-        get name of data format
+        get name of data format, if the upload has one
         """
-        return FORMATS[self.fieldname]
+        return FORMATS.get(self.fieldname)
 
 
 def first_in_directory(path: str, filter: str = None) -> str:
@@ -118,30 +126,28 @@ def from_directory(dirpath: str, *, data_only: bool = False) -> List[UnpackingRe
     ]
 
 
-def unpack(
-    filepath: str, outdir: str, *, strip: bool = False, data_only: bool = False
-) -> List[UnpackingRecord]:
+def read_submission(
+    filepath: str, open_upload: Callable[[str], BinaryIO]
+) -> Dict[str, Any]:
     """
-    b64 decode data uploads from submission JSON
+    read submission JSON, decoding each upload to the file opened
+    for it by `open_upload(header)` (see helpers.json_stream). raises
+    ValueError if the file is not valid JSON
     """
-
-    filename = os.path.basename(filepath).rstrip(".json")
-    outroot = os.path.join(outdir, filename)
-
-    os.makedirs(outroot)
-
-    # print("reading", filepath)
-
     with open(filepath) as f:
         try:
-            submission: Dict[str, Any] = json.load(f)
-        except json.JSONDecodeError:
-            sys.stderr.write(f"could not parse file: {filepath}\n")
-            sys.exit(-1)
+            return load_json(f, open_upload)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"could not parse file: {filepath}") from e
 
-    group = ExperimentGroup.parse(submission.get("group"))
 
-    unpacked_files = []
+def find_uploads(
+    submission: Dict[str, Any], *, data_only: bool = False
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    get the field name and node of each upload of a submission's group
+    """
+    group = ExperimentGroup.parse(submission.get("group"))
 
     # get file upload field names from group id
 
@@ -158,27 +164,114 @@ def unpack(
 
         if not node.get("data"):
             continue
+        if not isinstance(node["data"], DataURL):
+            raise ValueError(f"upload '{field}' is not base64 encoded")
+
+        yield field, node
+
+
+def unpack(
+    filepath: str, outdir: str, *, strip: bool = False, data_only: bool = False
+) -> List[UnpackingRecord]:
+    """
+    b64 decode data uploads from submission JSON.
+
+    the submission is read incrementally, and each upload is decoded in
+    chunks to a temporary file, which is moved into place once the group
+    of the submission is known
+    """
 
-        # print(f"inflating field '{field}'", end="... ")
-        # get original filename from json data
-        dataname: str = node["name"]
-        _, data = node.pop("data").split("base64,")
+    filename, _ = os.path.splitext(os.path.basename(filepath))
+    outroot = os.path.join(outdir, filename)
+
+    os.makedirs(outroot)
+
+    # print("reading", filepath)
 
-        outsubdir = os.path.join(outroot, field)
-        os.makedirs(outsubdir, exist_ok=True)
-        outpath = os.path.join(outsubdir, dataname)
+    uploads: List[BinaryIO] = []
 
-        with open(outpath, "wb") as f:
-            f.write(base64.b64decode(data, validate=True))
-        unpacked_files.append(UnpackingRecord(outpath, field, group))
+    def open_upload(header: str) -> BinaryIO:
+        upload = tempfile.NamedTemporaryFile(dir=outroot, suffix=".part", delete=False)
+        uploads.append(upload)
+        return upload
 
-        if strip:
-            first, *_ = field.split("/")
-            del submission[first]
+    try:
+        submission = read_submission(filepath, open_upload)
+        group = ExperimentGroup.parse(submission.get("group"))
 
-    json_outpath = os.path.join(outroot, f"{filename}.json")
+        unpacked_files = []
 
-    with open(json_outpath, "w") as f:
-        json.dump(submission, f)
+        for field, node in find_uploads(submission, data_only=data_only):
+            # print(f"inflating field '{field}'", end="... ")
+            # get original filename from json data
+            dataname: str = node["name"]
+            upload: DataURL = node.pop("data")
+
+            outsubdir = os.path.join(outroot, field)
+            os.makedirs(outsubdir, exist_ok=True)
+            outpath = os.path.join(outsubdir, dataname)
+
+            upload.file.close()
+            os.replace(upload.file.name, outpath)
+            unpacked_files.append(UnpackingRecord(outpath, field, group))
+
+            if strip:
+                first, *_ = field.split("/")
+                del submission[first]
+
+        json_outpath = os.path.join(outroot, f"{filename}.json")
+
+        with open(json_outpath, "w") as f:
+            dump_json(submission, f)
+    finally:
+        # remove uploads which were not unpacked
+        for upload in uploads:
+            upload.close()
+            if os.path.exists(upload.name):
+                os.remove(upload.name)
 
     return unpacked_files
+
+
+def unpack_buffers(
+    filepath: str, *, data_only: bool = False
+) -> List[Tuple[UnpackingRecord, BinaryIO]]:
+    """
+    b64 decode data uploads from submission JSON into buffers, rather
+    than writing them to disk. the filename of each record is the path
+    of the upload within the submission. buffers are held in memory up
+    to MAX_BUFFER_SIZE, and the caller should close them
+    """
+    filename, _ = os.path.splitext(os.path.basename(filepath))
+
+    uploads: List[BinaryIO] = []
+
+    def open_upload(header: str) -> BinaryIO:
+        upload = tempfile.SpooledTemporaryFile(max_size=MAX_BUFFER_SIZE)
+        uploads.append(upload)
+        return upload
+
+    unpacked = []
+    try:
+        submission = read_submission(filepath, open_upload)
+        group = ExperimentGroup.parse(submission.get("group"))
+
+        for field, node in find_uploads(submission, data_only=data_only):
+            upload: DataURL = node["data"]
+            upload.file.seek(0)
+            record = UnpackingRecord(
+                os.path.join(filename, field, node["name"]), field, group
+            )
+            unpacked.append((record, upload.file))
+    except BaseException:
+        for upload in uploads:
+            upload.close()
+        raise
+
+    # release uploads which were not unpacked
+    kept = {id(buffer) for _, buffer in unpacked}
+    for upload in uploads:
+        if id(upload) not in kept:
+            upload.close()
+
+    return unpacked
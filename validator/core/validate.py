@@ -1,42 +1,254 @@
-from io import FileIO
-from typing import Iterator
+from collections import Counter
+import os
+import tempfile
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
 import numpy as np
 
 from validator.const.severity import Severity
-from validator.model.contribution import Contribution
+from validator.core.cache import ContributionCache
+from validator.core.gridded import RAW_EXT, GriddedData
+from validator.core.plan import INTERVAL_TOLERANCE, SeriesLayout, ValidationPlan
+from validator.core.results import ResultStore
+from validator.model.contribution import (
+    Contribution,
+    GroupedRows,
+    InterleavedSeriesError,
+)
 from validator.model.message import Message
 from validator.model.schema import Schema
+from validator.model.series import Series
 
-INTERVAL_TOLERANCE = 1e-4
 
+def until_error(messages: Iterable[Message]) -> Iterator[Message]:
+    """
+    pass on messages up to and including the first error
+    """
+    for message in messages:
+        yield message
+        if message.severity == Severity.error:
+            return
 
-def validate_file(data_file: FileIO, schema: Schema) -> Iterator[Message]:
+
+def validate_file(
+    data_file: Union[str, BinaryIO],
+    schema: Schema,
+    streaming: bool = False,
+    cache: ContributionCache = None,
+    results: ResultStore = None,
+    fail_fast: bool = False,
+) -> Iterator[Message]:
     """
-    run validation checks on a file
+    run validation checks on a file.
+
+    in streaming mode, the file is read in chunks and the messages of
+    each series are produced as soon as it has been read, rather than
+    loading the whole file first. otherwise, the parsed file is taken
+    from the cache, if one is given. with a result store, only series
+    which have changed since they were last validated are checked.
+
+    the whole-file paths check the sorted columns of every series at
+    once, as they were read or cached. with `fail_fast`, validation
+    stops at the first error, and a streamed file is read no further
     """
+    if streaming:
+        yield from _validate_stream(data_file, schema, cache, results, fail_fast)
+        return
+    if fail_fast:
+        yield from until_error(validate_file(data_file, schema, False, cache, results))
+        return
+
+    plan = schema.validation_plan
     try:
-        contribution = Contribution.from_file(data_file, schema)
+        if cache is not None:
+            contribution, columns = cache.load_columns(data_file, schema)
+        else:
+            rows = GroupedRows.read(data_file, schema)
     except Exception as e:
         yield Message(Severity.error, "Could not read contribution", repr(e))
         return
 
-    for series in contribution.series:
-        for column in schema.get_data_columns():
-            values = series.data[column.name].values
-
-            if column.interval is not None:
-                intervals = values[1:] - values[:-1]
-
-                errors = np.abs(intervals - column.interval)
-                if np.any(errors > INTERVAL_TOLERANCE):
-                    yield Message(
-                        Severity.error,
-                        "Invalid data interval",
-                        f'{series}: Column "{column.name}" does not match expected interval: {column.interval}',
-                    )
-            if column.unique and np.unique(values).size > 1:
-                yield Message(
-                    Severity.error,
-                    "Multiple values in unique column",
-                    f'{series}: Column "{column.name}" expects a single value per series',
-                )
+    if cache is None and results is None:
+        yield from validate_rows(rows, schema)
+        return
+
+    if cache is not None:
+        series = contribution.series
+        values = {name: columns[name] for name in plan.columns} if series else None
+    else:
+        series = rows.to_contribution().series
+        values = {name: rows.values[name].to_numpy() for name in plan.columns}
+
+    yield from validate_all_series(series, schema, results, values=values)
+
+
+def _validate_stream(
+    data_file: Union[str, BinaryIO],
+    schema: Schema,
+    cache: ContributionCache = None,
+    results: ResultStore = None,
+    fail_fast: bool = False,
+) -> Iterator[Message]:
+    """
+    validate each series of a file as soon as it has been read. the
+    rows of each series must be contiguous, so its messages are final
+    once the next series begins.
+
+    if the rows of a series turn out not to be contiguous, the file is
+    read again whole. messages found for the first rows of a series
+    hold for the whole series, so only the other messages are added
+    """
+    produced = []
+    reader = Contribution.iter_file(data_file, schema)
+    while True:
+        try:
+            series = next(reader, None)
+        except InterleavedSeriesError:
+            break
+        except Exception as e:
+            yield Message(Severity.error, "Could not read contribution", repr(e))
+            return
+        if series is None:
+            return
+
+        for message in validate_series(series, schema, results):
+            produced.append(message)
+            yield message
+            if fail_fast and message.severity == Severity.error:
+                return
+
+    if not isinstance(data_file, str):
+        data_file.seek(0)
+    remaining = Counter(produced)
+    for message in validate_file(
+        data_file, schema, cache=cache, results=results, fail_fast=fail_fast
+    ):
+        if remaining[message]:
+            remaining[message] -= 1
+        else:
+            yield message
+
+
+def validate_series(
+    series: Series, schema: Schema, results: ResultStore = None
+) -> Iterator[Message]:
+    """
+    run validation checks on one series of a contribution
+    """
+    yield from validate_all_series([series], schema, results)
+
+
+def validate_all_series(
+    series: List[Series],
+    schema: Schema,
+    results: ResultStore = None,
+    values: Dict[str, np.ndarray] = None,
+) -> Iterator[Message]:
+    """
+    run validation checks on many series at once. the columns of all
+    series are joined end-to-end, so that each check is a few passes
+    over the joined arrays. messages are ordered by series. if the
+    joined columns are already at hand, they are given as `values`.
+
+    with a result store, stored messages are used for series which
+    have been validated before, and the others are checked and stored
+    """
+    plan = schema.validation_plan
+    if results is None:
+        yield from (message for _, message in _check(plan, series, values))
+        return
+
+    keys = [results.key(s, schema) for s in series]
+    stored = results.get(keys)
+
+    unchecked = [i for i, key in enumerate(keys) if key not in stored]
+    found = {keys[i]: [] for i in unchecked}
+    if len(unchecked) == len(series):
+        checked = _check(plan, series, values)
+    else:
+        checked = plan.check([series[i] for i in unchecked])
+    for j, message in checked:
+        found[keys[unchecked[j]]].append(message)
+    results.put(found)
+
+    for key in keys:
+        yield from stored[key] if key in stored else found[key]
+
+
+def _check(
+    plan: ValidationPlan, series: List[Series], values: Dict[str, np.ndarray] = None
+) -> Iterator[Tuple[int, Message]]:
+    """
+    run a plan on series, using their joined columns if given
+    """
+    if values is None:
+        return plan.check(series)
+    layout = SeriesLayout.from_lengths([s.num_records for s in series])
+    return plan.check_columns(layout, values, series.__getitem__)
+
+
+def validate_rows(rows: GroupedRows, schema: Schema) -> Iterator[Message]:
+    """
+    run validation checks on the grouped rows of a file. the sorted
+    columns already hold every series end-to-end, so they are checked
+    as they are, and only the series which fail are created
+    """
+    plan = schema.validation_plan
+    layout = SeriesLayout.from_bounds(rows.starts, rows.stops)
+    values = {name: rows.values[name].to_numpy() for name in plan.columns}
+    for _, message in plan.check_columns(layout, values, rows.series):
+        yield message
+
+
+def validate_gridded_file(
+    data_file: Union[str, BinaryIO], name: str = None, cache: ContributionCache = None
+) -> Iterator[Message]:
+    """
+    run validation checks on a gridded upload. the file is converted
+    to memory-mapped storage, and checked one slice at a time. with a
+    cache, the converted data are kept and reused for the same file,
+    otherwise they are written to a temporary directory
+    """
+    if cache is not None:
+        try:
+            data = cache.load_gridded(data_file, name)
+        except Exception as e:
+            yield Message(Severity.error, "Could not read gridded data", repr(e))
+            return
+
+        yield from validate_gridded(data)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            path = os.path.join(tmp, "upload" + RAW_EXT)
+            data = GriddedData.convert(data_file, path, name=name)
+        except Exception as e:
+            yield Message(Severity.error, "Could not read gridded data", repr(e))
+            return
+
+        yield from validate_gridded(data)
+
+
+def validate_gridded(data: GriddedData) -> Iterator[Message]:
+    """
+    run validation checks on converted gridded data
+    """
+    if not data.num_rows:
+        yield Message(
+            Severity.error, "Empty gridded data", f"{data.source}: no records found"
+        )
+        return
+
+    stats = data.get_statistics()
+    if stats.num_missing:
+        yield Message(
+            Severity.warning,
+            "Missing values in gridded data",
+            f"{data.source}: {stats.num_missing} of {data.num_rows * data.num_columns} values are not finite",
+        )
+    for i in np.flatnonzero(stats.num_values == 0):
+        yield Message(
+            Severity.error,
+            "Empty column in gridded data",
+            f"{data.source}: column {i + 1} has no valid values",
+        )
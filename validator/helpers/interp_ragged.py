@@ -0,0 +1,41 @@
+import numpy as np
+
+from validator.helpers.ragged_searchsorted import ragged_searchsorted
+
+
+def interp_ragged(
+    x: np.ndarray, xp: np.ndarray, fp: np.ndarray, offsets: np.ndarray
+) -> np.ndarray:
+    """
+    linearly interpolate several series onto the same points. series k is
+    `xp[offsets[k]:offsets[k + 1]]` (increasing), with one row of `fp` per
+    value column. equivalent to `np.interp(x, xp_k, fp_k)` for every series
+    and column, returned as an array of shape (series, columns, points)
+    """
+    lengths = np.diff(offsets)
+    n_series = lengths.size
+
+    # index of every series' first posting after each point
+    x_segment = np.repeat(np.arange(n_series), x.size)
+    xp_segment = np.repeat(np.arange(n_series), lengths)
+    upper = ragged_searchsorted(
+        xp, xp_segment, np.tile(x, n_series), x_segment, "right"
+    )
+
+    # clamp to the ends of each series
+    first = offsets[:-1][x_segment]
+    last = offsets[1:][x_segment] - 1
+    hi = np.clip(upper, first, last)
+    lo = np.clip(upper - 1, first, last)
+
+    span = xp[hi] - xp[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(span > 0, (np.tile(x, n_series) - xp[lo]) / span, 0.0)
+
+    fp = np.atleast_2d(fp)
+    low_values = fp[:, lo]
+    values = np.where(
+        frac > 0, low_values + frac * (fp[:, hi] - low_values), low_values
+    )
+
+    return values.reshape(fp.shape[0], n_series, x.size).transpose(1, 0, 2)
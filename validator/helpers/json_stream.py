@@ -0,0 +1,273 @@
+"""
+incremental reading and writing of JSON documents which hold large
+base64 data URLs, such as submissions and their uploads. each data URL
+is decoded in chunks to a binary file while the document is read, so
+that no more than a chunk of it is held in memory
+"""
+import base64
+import json
+import re
+from typing import Any, BinaryIO, Callable, Iterator, TextIO
+
+CHUNK_SIZE = 1 << 16
+
+# the header of a data URL ("data:<media type>;base64,") is looked for
+# in this many characters at the start of each string
+MAX_HEADER = 1024
+
+_SPECIAL = re.compile(r'["\\]')
+_LITERAL = re.compile(r"[-+.0-9a-zA-Z]+")
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class DataURL:
+    """
+    a base64 data URL, decoded to a binary file
+    """
+
+    def __init__(self, header: str, file: BinaryIO) -> None:
+        self.header = header
+        self.file = file
+
+    def encode(self, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+        """
+        the data URL as text, in chunks
+        """
+        yield self.header
+        self.file.seek(0)
+        # a multiple of 3 bytes encodes without padding
+        while True:
+            block = self.file.read(chunk_size // 4 * 3)
+            if not block:
+                return
+            yield base64.b64encode(block).decode("ascii")
+
+
+def load_json(
+    f: TextIO,
+    open_file: Callable[[str], BinaryIO],
+    chunk_size: int = CHUNK_SIZE,
+) -> Any:
+    """
+    read a JSON document, decoding each base64 data URL it holds to
+    the file opened for it by `open_file(header)`. the data URL is
+    replaced by a DataURL in the document
+    """
+    return _Scanner(f, open_file, chunk_size).document()
+
+
+def dump_json(obj: Any, f: TextIO) -> None:
+    """
+    write a document in the format of json.dump, encoding each DataURL
+    in chunks
+    """
+    if isinstance(obj, DataURL):
+        f.write('"')
+        for text in obj.encode():
+            f.write(json.dumps(text)[1:-1])
+        f.write('"')
+    elif isinstance(obj, dict):
+        f.write("{")
+        for i, (key, value) in enumerate(obj.items()):
+            if i:
+                f.write(", ")
+            f.write(json.dumps(str(key)))
+            f.write(": ")
+            dump_json(value, f)
+        f.write("}")
+    elif isinstance(obj, (list, tuple)):
+        f.write("[")
+        for i, value in enumerate(obj):
+            if i:
+                f.write(", ")
+            dump_json(value, f)
+        f.write("]")
+    else:
+        f.write(json.dumps(obj))
+
+
+class _Base64Writer:
+    """
+    decodes base64 text to a file, a chunk at a time
+    """
+
+    def __init__(self, file: BinaryIO, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.chunk_size:
+            self._flush()
+
+    def close(self) -> None:
+        self._flush(final=True)
+
+    def _flush(self, final: bool = False) -> None:
+        text = "".join(self._parts)
+        end = len(text) if final else len(text) // 4 * 4
+        self.file.write(base64.b64decode(text[:end], validate=True))
+        self._parts = [text[end:]]
+        self._size = len(text) - end
+
+
+class _Scanner:
+    def __init__(
+        self, f: TextIO, open_file: Callable[[str], BinaryIO], chunk_size: int
+    ) -> None:
+        self.f = f
+        self.open_file = open_file
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        # number of characters read before the buffer
+        self.offset = 0
+
+    def document(self) -> Any:
+        value = self.value()
+        if self.peek():
+            self.error("Extra data")
+        return value
+
+    def error(self, msg: str) -> None:
+        raise json.JSONDecodeError(msg, "", self.offset + self.pos)
+
+    def more(self, n: int = 1) -> bool:
+        """
+        make sure that n characters are buffered after the position
+        """
+        while len(self.buf) - self.pos < n:
+            text = self.f.read(self.chunk_size)
+            if not text:
+                return False
+            self.offset += self.pos
+            self.buf = self.buf[self.pos :] + text
+            self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        the next character which is not whitespace, or "" at the end
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.more():
+                return self.buf[self.pos : self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        char = self.peek()
+        if char == "{":
+            return self.object()
+        if char == "[":
+            return self.array()
+        if char == '"':
+            self.pos += 1
+            return self.string()
+        return self.literal()
+
+    def object(self) -> dict:
+        self.pos += 1
+        result = {}
+        if self.peek() == "}":
+            self.pos += 1
+            return result
+        while True:
+            if self.peek() != '"':
+                self.error("Expecting property name enclosed in double quotes")
+            self.pos += 1
+            key = json.loads(f'"{"".join(self.pieces())}"')
+            self.expect(":")
+            result[key] = self.value()
+            if self.peek() == "}":
+                self.pos += 1
+                return result
+            self.expect(",")
+
+    def array(self) -> list:
+        self.pos += 1
+        result = []
+        if self.peek() == "]":
+            self.pos += 1
+            return result
+        while True:
+            result.append(self.value())
+            if self.peek() == "]":
+                self.pos += 1
+                return result
+            self.expect(",")
+
+    def literal(self) -> Any:
+        match = _LITERAL.match(self.buf, self.pos)
+        # a literal may continue in the next chunk
+        while match and match.end() == len(self.buf):
+            if not self.more(match.end() - self.pos + 1):
+                break
+            match = _LITERAL.match(self.buf, self.pos)
+        if not match:
+            self.error("Expecting value")
+        try:
+            value = json.loads(match.group())
+        except json.JSONDecodeError:
+            self.error("Expecting value")
+        self.pos = match.end()
+        return value
+
+    def pieces(self) -> Iterator[str]:
+        """
+        the raw text of a string up to its closing quote, in pieces.
+        each escape sequence is a piece of its own
+        """
+        while True:
+            match = _SPECIAL.search(self.buf, self.pos)
+            if match is None:
+                yield self.buf[self.pos :]
+                self.pos = len(self.buf)
+                if not self.more():
+                    self.error("Unterminated string")
+                continue
+
+            start = match.start()
+            yield self.buf[self.pos : start]
+            if match.group() == '"':
+                self.pos = start + 1
+                return
+
+            # buffering more text moves the position
+            self.pos = start
+            length = 6 if self.more(2) and self.buf[self.pos + 1] == "u" else 2
+            if not self.more(length):
+                self.error("Unterminated string")
+            yield self.buf[self.pos : self.pos + length]
+            self.pos += length
+
+    def string(self) -> Any:
+        pieces = self.pieces()
+        head = []
+        size = 0
+        for piece in pieces:
+            head.append(piece)
+            size += len(piece)
+            if size >= MAX_HEADER:
+                break
+
+        raw = "".join(head)
+        text = json.loads(f'"{raw}"')
+        header, comma, rest = text.partition(",")
+        if not (comma and header.startswith("data:") and header.endswith("base64")):
+            return json.loads(f'"{raw}{"".join(pieces)}"')
+
+        file = self.open_file(header + comma)
+        writer = _Base64Writer(file, self.chunk_size)
+        writer.write(rest)
+        for piece in pieces:
+            writer.write(json.loads(f'"{piece}"') if piece[:1] == "\\" else piece)
+        writer.close()
+        return DataURL(header + comma, file)
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def ragged_searchsorted(
+    t: np.ndarray,
+    t_segment: np.ndarray,
+    values: np.ndarray,
+    values_segment: np.ndarray,
+    side: str = "left",
+) -> np.ndarray:
+    """
+    searchsorted over several sorted series stored end-to-end. each
+    value is located only among the times of its own segment, and the
+    offset returned is into the concatenated array `t`
+    """
+    n_values = values.size
+    # sort values and data records together; on ties, values are placed
+    #  before data records for side="left" and after them for "right"
+    value_first = 0 if side == "left" else 1
+    tie = np.concatenate(
+        [
+            np.full(n_values, value_first, dtype=np.int8),
+            np.full(t.size, 1 - value_first, dtype=np.int8),
+        ]
+    )
+    order = np.lexsort(
+        (
+            tie,
+            np.concatenate([values, t]),
+            np.concatenate([values_segment, t_segment]),
+        )
+    )
+
+    # number of data records sorted before each value
+    is_data = order >= n_values
+    n_before = np.cumsum(is_data) - is_data
+
+    out = np.empty(n_values, dtype=np.intp)
+    out[order[~is_data]] = n_before[~is_data]
+    return out
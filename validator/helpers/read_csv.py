@@ -0,0 +1,106 @@
+from importlib.util import find_spec
+import io
+from typing import Any, Dict, List
+import pandas as pd
+
+ENGINES = ("auto", "c", "python", "pyarrow")
+
+# values which pandas reads as missing
+NA_VALUES = {
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+}
+
+
+def read_csv(
+    source: Any,
+    names: List[str],
+    dtypes: Dict[str, Any],
+    engine: str = "c",
+    chunksize: int = None,
+) -> pd.DataFrame:
+    """
+    read a headerless, comma-separated file with the given column names
+    and types. lines starting with '#' are ignored.
+
+    the pyarrow engine needs pyarrow to be installed, and a path or a
+    binary file. it does not support chunks, and fails on data rows with
+    the wrong number of fields. 'auto' uses pyarrow if it can, and the C
+    engine otherwise
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown CSV engine: '{engine}'")
+
+    if engine == "auto":
+        usable = (
+            chunksize is None
+            and not isinstance(source, io.TextIOBase)
+            and find_spec("pyarrow") is not None
+        )
+        engine = "pyarrow" if usable else "c"
+
+    if engine != "pyarrow":
+        return pd.read_csv(
+            source,
+            names=names,
+            dtype=dtypes,
+            comment="#",
+            skipinitialspace=True,
+            index_col=False,
+            engine=engine,
+            chunksize=chunksize,
+        )
+
+    if chunksize is not None:
+        raise ValueError("the pyarrow engine cannot read files in chunks")
+
+    import pyarrow as pa
+    from pyarrow import csv
+
+    def skip_comment(row: Any) -> str:
+        # comment lines need not have the full number of fields
+        return "skip" if row.text.lstrip().startswith("#") else "error"
+
+    # arrow has no comment handling: read every column as text, so that
+    #  comment lines with the full number of fields can be removed, then
+    #  convert the columns as the C engine does
+    table = csv.read_csv(
+        source,
+        read_options=csv.ReadOptions(column_names=names),
+        parse_options=csv.ParseOptions(invalid_row_handler=skip_comment),
+        convert_options=csv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            strings_can_be_null=False,
+        ),
+    )
+    data = table.to_pandas()
+
+    comments = data[names[0]].str.lstrip().str.startswith("#")
+    data = data[~comments].reset_index(drop=True)
+
+    for name in names:
+        values = data[name].str.lstrip()
+        values = values.mask(values.str.rstrip().isin(NA_VALUES))
+        dtype = dtypes.get(name, object)
+        if dtype in (str, "category", object):
+            data[name] = values.astype(dtype)
+        else:
+            data[name] = pd.to_numeric(values).astype(dtype)
+    return data
@@ -0,0 +1,119 @@
+from typing import Dict, Iterator, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+
+class ColumnStore:
+    """
+    compact storage for the data columns of a series. each named
+    column is one row of a contiguous 2-D float block, and columns
+    are returned as numpy views of the block
+    """
+
+    __slots__ = ("_names", "_index", "_block")
+
+    def __init__(self, names: Sequence[str], block: np.ndarray) -> None:
+        block = np.asarray(block)
+        if block.ndim != 2 or block.shape[0] != len(names):
+            raise ValueError(
+                f"expected block of {len(names)} columns, got shape {block.shape}"
+            )
+        self._names = tuple(names)
+        self._index = {name: i for i, name in enumerate(self._names)}
+        self._block = block
+
+    @classmethod
+    def from_columns(
+        cls, columns: Dict[str, np.ndarray], dtype: np.dtype = np.float64
+    ) -> "ColumnStore":
+        """
+        create store from a mapping of column names to values
+        """
+        names = list(columns)
+        if not names:
+            return cls(names, np.empty((0, 0), dtype=dtype))
+
+        block = np.empty((len(names), np.size(columns[names[0]])), dtype=dtype)
+        for i, name in enumerate(names):
+            block[i] = columns[name]
+        return cls(names, block)
+
+    @classmethod
+    def from_frame(
+        cls, frame: pd.DataFrame, dtype: np.dtype = np.float64
+    ) -> "ColumnStore":
+        """
+        create store from the columns of a pandas DataFrame
+        """
+        block = np.ascontiguousarray(frame.to_numpy(dtype=dtype).T)
+        return cls([str(c) for c in frame.columns], block)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        convert to a pandas DataFrame
+        """
+        return pd.DataFrame({name: self[name] for name in self._names})
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return self._names
+
+    @property
+    def block(self) -> np.ndarray:
+        return self._block
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._block.dtype
+
+    def copy(self) -> "ColumnStore":
+        return ColumnStore(self._names, self._block.copy())
+
+    def __len__(self) -> int:
+        return self._block.shape[1]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        try:
+            return self._block[self._index[name]]
+        except KeyError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name: str, values: np.ndarray) -> None:
+        if name in self._index:
+            self._block[self._index[name]] = values
+            return
+
+        # new columns need a larger block
+        row = np.empty((1, len(self)), dtype=self._block.dtype)
+        row[0] = values
+        self._block = np.vstack([self._block, row])
+        self._names = (*self._names, name)
+        self._index[name] = len(self._names) - 1
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getstate__(self) -> Tuple[Tuple[str, ...], np.ndarray]:
+        return self._names, self._block
+
+    def __setstate__(self, state: Tuple[Tuple[str, ...], np.ndarray]) -> None:
+        names, block = state
+        self._names = names
+        self._index = {name: i for i, name in enumerate(names)}
+        self._block = block
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} {len(self)} records: {', '.join(self._names)}>"
+        )
@@ -1,6 +1,8 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from optparse import Option
-from typing import Iterator, List, Optional, TextIO, Union
+from typing import BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple, Union
 import pandas as pd
 import numpy as np
 from itertools import product
@@ -14,7 +16,10 @@ from validator.const.basins import (
     REGIONS_RIGNOT,
 )
 from validator.helpers.decimal_year_to_datetime import decimal_year_to_datetime
+from validator.helpers.interp_ragged import interp_ragged
+from validator.helpers.read_csv import read_csv
 
+from validator.model.columns import ColumnStore
 from validator.model.schema import Schema
 from .series import Series
 import datetime as dt
@@ -28,6 +33,13 @@ class FormatError(Exception):
     """
 
 
+class InterleavedSeriesError(FormatError):
+    """
+    raised when a file is read series by series, but the rows of a
+    series are not contiguous in it
+    """
+
+
 @dataclass(frozen=True)
 class Statistics:
     start: dt.datetime
@@ -36,25 +48,130 @@ class Statistics:
     interval: dt.timedelta
 
 
+SeriesKey = Tuple[Optional[str], Optional[BasinGroup], Optional[BasinID]]
+
+
+class SeriesIndex:
+    """
+    lookup of series by data format, basin group and basin id. each
+    series is stored under every combination of its own values and
+    wildcards (None), so that any query is a single dictionary lookup
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[SeriesKey, List[Series]] = defaultdict(list)
+        self.size = 0
+
+    def add(self, series: Series) -> None:
+        for fmt in (series.data_format, None):
+            for group in (series.basin_group, None):
+                for basin in (series.basin_id, None):
+                    self._entries[fmt, group, basin].append(series)
+        self.size += 1
+
+    def find(
+        self,
+        format: str = None,
+        basin_group: BasinGroup = None,
+        basin_id: BasinID = None,
+    ) -> List[Series]:
+        return self._entries.get((format, basin_group, basin_id), [])
+
+
+def _counts_change(method):
+    """
+    wrap a list method so that calling it counts as a change
+    """
+
+    def changed(self, *args, **kwargs):
+        self.changes += 1
+        return method(self, *args, **kwargs)
+
+    changed.__name__ = method.__name__
+    changed.__doc__ = method.__doc__
+    return changed
+
+
+class SeriesList(list):
+    """
+    list of series which counts the changes made to it other than
+    appending, so that an index of the list can tell when it must be
+    rebuilt rather than extended
+    """
+
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.changes = 0
+
+    __setitem__ = _counts_change(list.__setitem__)
+    __delitem__ = _counts_change(list.__delitem__)
+    __imul__ = _counts_change(list.__imul__)
+    insert = _counts_change(list.insert)
+    pop = _counts_change(list.pop)
+    remove = _counts_change(list.remove)
+    clear = _counts_change(list.clear)
+    sort = _counts_change(list.sort)
+    reverse = _counts_change(list.reverse)
+
+
 @dataclass(frozen=True)
 class Contribution:
     username: str
     experiment_group: ExperimentGroup
     # name: str = None
     # institute: str = None
-    series: List[Series] = field(default_factory=list)
+    series: List[Series] = field(default_factory=SeriesList)
+    # built on first lookup, extended as series are appended, and
+    #  rebuilt when the list of series is changed in any other way
+    _index: SeriesIndex = field(
+        default_factory=SeriesIndex, init=False, repr=False, compare=False
+    )
+    _index_changes: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.series, SeriesList):
+            object.__setattr__(self, "series", SeriesList(self.series))
 
     def join(self, *others: "Contribution") -> "Contribution":
         """
         return new contribution which combines data
         of all
         """
-        series = self.series
+        series = self.series.copy()
         for contrib in others:
             series += contrib.series
 
         return Contribution(self.username, self.experiment_group, series)
 
+    def add(self, series: Series) -> None:
+        """
+        add a series to the contribution
+        """
+        self.series.append(series)
+        self._lookup()
+
+    def _lookup(
+        self,
+        format: str = None,
+        basin_group: BasinGroup = None,
+        basin_id: BasinID = None,
+    ) -> List[Series]:
+        """
+        find series using the index, first bringing it up to
+        date with the list of series
+        """
+        if (
+            self._index.size > len(self.series)
+            or self._index_changes != self.series.changes
+        ):
+            # series have been replaced, removed or reordered: start again
+            object.__setattr__(self, "_index", SeriesIndex())
+            object.__setattr__(self, "_index_changes", self.series.changes)
+        for series in self.series[self._index.size :]:
+            self._index.add(series)
+
+        return self._index.find(format, basin_group, basin_id)
+
     def filter(
         self,
         *,
@@ -62,14 +179,7 @@ class Contribution:
         basin_id: BasinID = None,
         basin_group: BasinGroup = None,
     ) -> "Contribution":
-        series = self.series.copy()
-
-        if format is not None:
-            series = [s for s in series if s.data_format == format]
-        if basin_group is not None:
-            series = [s for s in series if s.basin_group == basin_group]
-        if basin_id is not None:
-            series = [s for s in series if s.basin_id == basin_id]
+        series = self._lookup(format, basin_group, basin_id).copy()
 
         return Contribution(self.username, self.experiment_group, series)
 
@@ -80,9 +190,10 @@ class Contribution:
         basin_id: BasinID = None,
         basin_group: BasinGroup = None,
     ) -> Optional[Series]:
-        return self.filter(
-            basin_id=basin_id, basin_group=basin_group, format=format
-        ).first()
+        matches = self._lookup(format, basin_group, basin_id)
+        if matches:
+            return matches[0]
+        return None
 
     def __iter__(self) -> Iterator[Series]:
         yield from self.series
@@ -99,19 +210,19 @@ class Contribution:
         num_epochs = []
 
         for series in self.series:
-            if "date" in series.data.columns:
-                series_start = series.data.date.min()
-                series_end = series.data.date.max()
+            if "date" in series.columns:
+                series_start = series.column("date").min()
+                series_end = series.column("date").max()
             else:
-                series_start = series.data.date_0.min()
-                series_end = series.data.date_1.max()
+                series_start = series.column("date_0").min()
+                series_end = series.column("date_1").max()
 
             if first_start is None or first_start > series_start:
                 first_start = series_start
             if last_end is None or last_end < series_end:
                 last_end = series_end
 
-            num_epochs.append(series.data.index.size)
+            num_epochs.append(series.num_records)
 
         # first_start = min([series.data["date"].min() for series in self.series])
         # last_end = max([series.data["date"].max() for series in self.series])
@@ -127,22 +238,57 @@ class Contribution:
 
         return Statistics(start, end, duration, mean_interval)
 
-    def sum_regions(self) -> None:
+    def sum_regions(self, jobs: int = None, processes: bool = False) -> None:
         """
         create series for all missing regions for which basin data
-        are available
+        are available.
+
+        with more than one job, every candidate summation is run in a
+        thread pool (or a process pool, if requested). results are
+        added in the same order as the serial path
         """
-        formats = {s.data_format for s in self}
+        formats = sorted({s.data_format for s in self})
         # groups = {s.basin_group for s in self if s != BasinGroup.GENERIC}
         groups = [BasinGroup.RIGNOT, BasinGroup.ZWALLY]
         sheets = [IceSheet.APIS, IceSheet.EAIS, IceSheet.WAIS, IceSheet.GRIS]
 
-        for region, group, fmt in product(sheets, groups, formats):
-            if self.get(format=fmt, basin_id=region) is None:
+        # plan summations for all regions missing from the input
+        plan = [
+            (region, group, fmt)
+            for region, group, fmt in product(sheets, groups, formats)
+            if self.get(format=fmt, basin_id=region) is None
+        ]
+
+        results = None
+        if jobs is not None and jobs > 1 and plan:
+            # workers are sent only the basins of each region, rather
+            #  than the whole contribution
+            basins = [self._region_basins(*planned) for planned in plan]
+            todo = [i for i, members in enumerate(basins) if members is not None]
+
+            results = [None] * len(plan)
+            executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+            with executor(max_workers=jobs) as pool:
+                summed = pool.map(
+                    sum_basins,
+                    [basins[i] for i in todo],
+                    [plan[i][0] for i in todo],
+                    [plan[i][2] for i in todo],
+                )
+                for i, series in zip(todo, summed):
+                    results[i] = series
+
+        for i, (region, group, fmt) in enumerate(plan):
+            # the first basin group to produce a region is used
+            if self.get(format=fmt, basin_id=region) is not None:
+                continue
 
+            if results is not None:
+                new_series = results[i]
+            else:
                 new_series = self.sum_region(region, group, fmt)
-                if new_series is not None:
-                    self.series.append(new_series)
+            if new_series is not None:
+                self.add(new_series)
 
     def sum_region(
         self, region: IceSheet, basin_type: BasinGroup, data_format: str
@@ -150,6 +296,17 @@ class Contribution:
         """
         create series for region from summed basin if possible
         """
+        basins = self._region_basins(region, basin_type, data_format)
+        if basins is None:
+            return None
+        return sum_basins(basins, region, data_format)
+
+    def _region_basins(
+        self, region: IceSheet, basin_type: BasinGroup, data_format: str
+    ) -> Optional[List[Series]]:
+        """
+        get the series of each basin of a region, if all are available
+        """
         basin_set = {
             BasinGroup.ZWALLY: REGIONS_ZWALLY,
             BasinGroup.RIGNOT: REGIONS_RIGNOT,
@@ -165,47 +322,167 @@ class Contribution:
 
             basins.append(series)
 
-        head, *tail = basins
-        sum_data = head.data.copy()
+        return basins
 
-        columns = head.data.columns
+    @classmethod
+    def from_file(
+        cls,
+        source: Union[str, TextIO, BinaryIO],
+        schema: Schema,
+        *,
+        compact: bool = False,
+        dtype: np.dtype = np.float64,
+        engine: str = "c",
+    ) -> "Contribution":
+        """
+        read a contribution from a data file, using the column types
+        given by the schema and the chosen CSV engine (see read_csv).
 
-        t_column = "date_0" if "date_0" in columns else "date"
-        data_columns = [colname for colname in columns if "date" not in colname]
+        in compact mode, the data of each series are held in a
+        ColumnStore of the given dtype rather than a DataFrame
+        """
+        rows = GroupedRows.read(source, schema, engine=engine)
+        return rows.to_contribution(compact=compact, dtype=dtype)
 
-        t = head.data[t_column].values
+    @staticmethod
+    def iter_file(
+        source: Union[str, TextIO, BinaryIO],
+        schema: Schema,
+        *,
+        chunksize: int = 100_000,
+        compact: bool = False,
+        dtype: np.dtype = np.float64,
+    ) -> Iterator[Series]:
+        """
+        read the series of a data file one at a time.
 
-        for other in tail:
-            t_other = other.data[t_column].values
-            for colname in data_columns:
-                sum_data[colname] += np.interp(t, t_other, other.data[colname].values)
+        the file is read in chunks of rows, and each series is produced
+        as soon as the rows of the next one begin, so that only one
+        series is held in memory. the rows of each series must be
+        contiguous in the file, and series are produced in file order
+        """
+        username_column = schema.get_column("Username")
+        experiment_group_column = schema.get_column("ExperimentGroup")
 
-        return Series(
-            sum_data,
-            data_format,
-            head.contributor,
-            head.experiment_group,
-            region,
-            BasinGroup.GENERIC,
-            computed=True,
+        column_headers = [column.name for column in schema.columns]
+        names = [col.name for col in schema.get_property_columns()]
+
+        reader = read_csv(
+            source, column_headers, schema.get_dtypes(), chunksize=chunksize
         )
 
+        username = None
+        experiment_group = None
+
+        # property values of the series being read, and its rows so far
+        current: Optional[Tuple[str, ...]] = None
+        combination = None
+        parts: List[pd.DataFrame] = []
+        finished = set()
+
+        def make_series() -> Series:
+            values = pd.concat(parts) if len(parts) > 1 else parts[0]
+            values = values.drop(columns=names)
+            if compact:
+                values = ColumnStore.from_frame(values, dtype)
+            attrs = series_attributes(schema, combination)
+            return Series(values, data_format=schema.name, **attrs)
+
+        # closing the reader stops pandas from closing file objects
+        #  which are passed to it
+        with reader:
+            for chunk in reader:
+                usernames = chunk[username_column.name].unique()
+
+                if username is None:
+                    if usernames.size > 1:
+                        if chunk[username_column.name][1:].unique().size == 1:
+                            # first row is a header
+                            chunk = chunk.iloc[1:]
+                            usernames = chunk[username_column.name].unique()
+                        else:
+                            raise FormatError(
+                                f"file contains multiple definitions for username: {list(usernames)}"
+                            )
+                    if chunk.empty:
+                        continue
+                    username = usernames[0]
+                    experiment_group = chunk[experiment_group_column.name].iloc[0]
+
+                if usernames.size > 1 or usernames[0] != username:
+                    raise FormatError(
+                        f"file contains multiple definitions for username: {[username, *usernames]}"
+                    )
+                groups = chunk[experiment_group_column.name].unique()
+                if groups.size > 1 or groups[0] != experiment_group:
+                    raise FormatError(
+                        f"file contains multiple definitions for experiment group: {[experiment_group, *groups]}"
+                    )
+
+                # rows with missing properties do not belong to any series
+                chunk = chunk.dropna(subset=names)
+                if chunk.empty:
+                    continue
+
+                # split the chunk into runs of rows with the same properties
+                keys = chunk[names].astype(str).to_numpy()
+                changes = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+                bounds = [0, *changes, len(chunk)]
+
+                for start, stop in zip(bounds[:-1], bounds[1:]):
+                    key = tuple(keys[start])
+                    if key != current:
+                        if current is not None:
+                            yield make_series()
+                            finished.add(current)
+                        if key in finished:
+                            raise InterleavedSeriesError(
+                                f"rows of series {list(key)} are not contiguous in file"
+                            )
+                        current = key
+                        combination = tuple(chunk[names].iloc[start])
+                        parts = []
+                    parts.append(chunk.iloc[start:stop])
+
+            if current is not None:
+                yield make_series()
+
+
+@dataclass(frozen=True)
+class GroupedRows:
+    """
+    the rows of a data file, sorted so that the records of each series
+    are contiguous. series i holds the sorted rows [starts[i], stops[i])
+    """
+
+    schema: Schema
+    username: str
+    experiment_group: ExperimentGroup
+    # attributes of each series, and data columns of the sorted rows
+    attrs: List[Dict[str, object]]
+    values: pd.DataFrame
+    starts: np.ndarray
+    stops: np.ndarray
+
     @classmethod
-    def from_file(cls, source: Union[str, TextIO], schema: Schema) -> "Contribution":
+    def read(
+        cls,
+        source: Union[str, TextIO, BinaryIO],
+        schema: Schema,
+        *,
+        engine: str = "c",
+    ) -> "GroupedRows":
         """
-        read a contribution from a data file
+        read and group the rows of a data file, using the column types
+        given by the schema and the chosen CSV engine (see read_csv)
         """
         username_column = schema.get_column("Username")
         experiment_group_column = schema.get_column("ExperimentGroup")
 
         column_headers = [column.name for column in schema.columns]
 
-        data: pd.DataFrame = pd.read_csv(
-            source,
-            names=column_headers,
-            comment="#",
-            skipinitialspace=True,
-            index_col=False,
+        data: pd.DataFrame = read_csv(
+            source, column_headers, schema.get_dtypes(), engine=engine
         )
         # if "date_0" in column_headers:
         #     data["date"] = (data.date_0 + data.date_1) / 2
@@ -231,49 +508,165 @@ class Contribution:
             data[experiment_group_column.name][header_skip_idx]
         )
 
-        prop_columns = schema.get_property_columns()
+        names = [col.name for col in schema.get_property_columns()]
+        order, starts, stops = group_rows(data, names)
+
+        # the attributes of every series are parsed here, so that
+        #  unknown basins are reported when the file is read
+        props = data[names]
+        attrs = [series_attributes(schema, props.iloc[order[i]]) for i in starts]
+
+        return cls(
+            schema,
+            username,
+            experiment_group,
+            attrs=attrs,
+            values=data.iloc[order].drop(columns=names),
+            starts=starts,
+            stops=stops,
+        )
+
+    @property
+    def num_series(self) -> int:
+        return self.starts.size
+
+    def series(self, i: int) -> Series:
+        """
+        create series i from a slice of the sorted rows
+        """
+        return Series(
+            self.values.iloc[self.starts[i] : self.stops[i]],
+            data_format=self.schema.name,
+            **self.attrs[i],
+        )
+
+    def to_contribution(
+        self, *, compact: bool = False, dtype: np.dtype = np.float64
+    ) -> Contribution:
+        """
+        create the contribution holding every series. in compact mode,
+        the data of each series are held in a ColumnStore of the given
+        dtype rather than a DataFrame
+        """
+        if not compact:
+            series = [self.series(i) for i in range(self.num_series)]
+            return Contribution(self.username, self.experiment_group, series=series)
+
+        # one block holds the data of every series
+        block = np.ascontiguousarray(self.values.to_numpy(dtype=dtype).T)
+        value_names = [str(c) for c in self.values.columns]
+
         series = []
+        for start, stop, attrs in zip(self.starts, self.stops, self.attrs):
+            series.append(
+                Series(
+                    ColumnStore(value_names, block[:, start:stop]),
+                    data_format=self.schema.name,
+                    **attrs,
+                )
+            )
+        return Contribution(self.username, self.experiment_group, series=series)
 
-        property_combinations = product(
-            *[data[col.name].unique() for col in prop_columns]
+
+def sum_basins(basins: List[Series], region: IceSheet, data_format: str) -> Series:
+    """
+    create series for a region by summing the series of its basins
+    """
+    head, *tail = basins
+    sum_data = head.data.copy()
+
+    columns = head.columns
+
+    t_column = "date_0" if "date_0" in columns else "date"
+    data_columns = [colname for colname in columns if "date" not in colname]
+
+    t = head.column(t_column)
+
+    if tail:
+        # stack the other basins end-to-end, interpolate all of their
+        #  columns onto the head series' postings at once, and sum
+        #  values and uncertainties in a single reduction
+        offsets = np.cumsum([0] + [other.num_records for other in tail])
+        t_others = np.concatenate([other.column(t_column) for other in tail])
+        values = np.stack(
+            [
+                np.concatenate([other.column(colname) for other in tail])
+                for colname in data_columns
+            ]
         )
 
-        for combination in property_combinations:
-            names = [col.name for col in prop_columns]
+        # interpolation needs increasing postings within each basin
+        basin_idx = np.repeat(np.arange(len(tail)), np.diff(offsets))
+        order = np.lexsort((t_others, basin_idx))
 
-            row_filter = np.ones_like(data.index, dtype=np.bool8)
+        totals = interp_ragged(t, t_others[order], values[:, order], offsets)
+        totals = totals.sum(axis=0)
 
-            for name, value in zip(names, combination):
-                row_filter = np.logical_and(row_filter, data[name] == value)
+        for colname, total in zip(data_columns, totals):
+            sum_data[colname] = head.column(colname) + total
 
-            series_data: pd.DataFrame = data[row_filter].drop(columns=names)
+    return Series(
+        sum_data,
+        data_format,
+        head.contributor,
+        head.experiment_group,
+        region,
+        BasinGroup.GENERIC,
+        computed=True,
+    )
 
-            # if "date_0" in column_headers:
-            #     rows, _ = series_data.shape
-            #     series_data["date"] = series_data.date_0
 
-            # if rows == 1:
-            #     copy = series_data.copy()
-            #     series_data["date"] = series_data.date_1
-            #     series_data = pd.concat([series_data, copy], ignore_index=True)
+def group_rows(
+    data: pd.DataFrame, names: List[str]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    group the rows of a data frame by the values of the given columns.
 
-            if not row_filter.any():
-                continue
+    returns a row order in which each group is contiguous, and the
+    [start, stop) positions of each group within it. groups are ordered
+    as the product of each column's values in order of appearance, and
+    rows keep their original order within a group. rows with missing
+    values are not assigned to any group
+    """
+    codes = [pd.factorize(data[name])[0] for name in names]
 
-            attrs = {}
-            for col, value in zip(prop_columns, combination):
-                if col.type == "ExperimentGroup":
-                    value = ExperimentGroup.parse(value)
-                else:
-                    attrs[col.name] = str(value)
-                attrs[col.name] = value
-
-            basin_id_name = schema.get_column("BasinID").name
-            basin_group_name = schema.get_column("BasinGroup").name
-            attrs[basin_group_name], attrs[basin_id_name] = parse_basin(
-                attrs[basin_group_name], attrs[basin_id_name]
-            )
+    rows = np.arange(len(data))
+    if codes:
+        rows = rows[np.all(np.stack(codes) >= 0, axis=0)]
+        # np.lexsort uses the last key as the primary one
+        rows = rows[np.lexsort([c[rows] for c in reversed(codes)])]
+
+    if not rows.size:
+        return rows, rows, rows
+
+    sorted_codes = (
+        np.stack([c[rows] for c in codes]) if codes else np.empty((0, rows.size))
+    )
+    changes = np.flatnonzero(
+        np.any(sorted_codes[:, 1:] != sorted_codes[:, :-1], axis=0)
+    )
 
-            series.append(Series(series_data, data_format=schema.name, **attrs))
+    starts = np.concatenate([[0], changes + 1])
+    stops = np.concatenate([changes + 1, [rows.size]])
+    return rows, starts, stops
 
-        return cls(username, experiment_group, series=series)
+
+def series_attributes(schema: Schema, combination: Tuple) -> Dict[str, object]:
+    """
+    create the attributes of a series from the values of the
+    schema's property columns
+    """
+    attrs = {}
+    for col, value in zip(schema.get_property_columns(), combination):
+        if col.type == "ExperimentGroup":
+            value = ExperimentGroup.parse(value)
+        else:
+            attrs[col.name] = str(value)
+        attrs[col.name] = value
+
+    basin_id_name = schema.get_column("BasinID").name
+    basin_group_name = schema.get_column("BasinGroup").name
+    attrs[basin_group_name], attrs[basin_id_name] = parse_basin(
+        attrs[basin_group_name], attrs[basin_id_name]
+    )
+    return attrs
@@ -16,3 +16,9 @@ class Message:
             _dict["description"] = self.description
 
         return _dict
+
+    @classmethod
+    def from_json(cls, _dict: Dict[str, str]) -> "Message":
+        return cls(
+            Severity(_dict["severity"]), _dict["title"], _dict.get("description")
+        )
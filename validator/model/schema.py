@@ -1,5 +1,7 @@
 from dataclasses import dataclass
+from functools import cached_property
 import io
+import numpy as np
 import yaml
 from typing import Any, Dict, List, Union
 
@@ -32,12 +34,37 @@ class Schema:
     def get_data_columns(self) -> List[ColumnRule]:
         return [col for col in self.columns if not col.property]
 
+    def get_dtypes(self) -> Dict[str, Any]:
+        """
+        types used to read each column: properties are categorical,
+        and float columns are double precision
+        """
+        dtypes = {}
+        for col in self.columns:
+            if col.property:
+                dtypes[col.name] = "category"
+            elif col.type == "float":
+                dtypes[col.name] = np.float64
+            else:
+                dtypes[col.name] = str
+        return dtypes
+
     def get_column(self, _type: str) -> ColumnRule:
         for col in self.columns:
             if col.type == _type:
                 return col
         raise ValueError(f"no column found with type '{_type}'")
 
+    @cached_property
+    def validation_plan(self) -> "ValidationPlan":
+        """
+        checks to run on the data of each series, compiled
+        once for each schema
+        """
+        from validator.core.plan import ValidationPlan
+
+        return ValidationPlan.compile(self)
+
     @staticmethod
     def parse_props(**props: Any) -> Dict[str, Any]:
         return {
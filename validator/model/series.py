@@ -1,14 +1,31 @@
 from os import truncate
 import pandas as pd
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Union
 import datetime as dt
+import hashlib
 import numpy as np
 
 from validator.const.basins import BasinGroup, BasinID
 from validator.const.experiment_groups import ExperimentGroup
 from validator.helpers.decimal_year_to_datetime import decimal_year_to_datetime
+from validator.helpers.derived_cache import DerivedCache
 from validator.helpers.timedelta_to_decimal_year import timedelta_to_decimal_year
-from validator.proc.dm_to_dmdt.dm_to_dmdt import LSQMethod, dm_to_dmdt
+from validator.model.columns import ColumnStore
+from validator.proc.dm_to_dmdt.dm_to_dmdt import LSQMethod
+from validator.proc.dm_to_dmdt.incremental import DmdtState
+
+# dmdt configuration
+DMDT_SETTINGS = dict(
+    wsize=3.0,
+    lsq_method=LSQMethod.cumulative_weighted,
+    truncate=False,
+    tapering=True,
+)
+
+# results of conversions and statistics of all series, of which only the
+#  most recently used are kept
+DERIVED = DerivedCache(maxsize=128)
 
 
 @dataclass(frozen=True)
@@ -27,13 +44,15 @@ class Series:
     one data series from CSV data file
     """
 
-    data: pd.DataFrame
+    data: Union[pd.DataFrame, ColumnStore]
     data_format: str
     contributor: str
     experiment_group: ExperimentGroup
     basin_id: BasinID
     basin_group: BasinGroup
     computed: bool = False
+    # identifies the series in DERIVED
+    _key: object = field(default_factory=object, init=False, repr=False, compare=False)
 
     @property
     def identifier(self) -> str:
@@ -41,28 +60,103 @@ class Series:
             f"{self.experiment_group.value}/{self.contributor}: {self.basin_id.value}"
         )
 
-    def to_dmdt(self) -> "Series":
-        assert self.data_format == "dm", "series already contains dmdt data"
+    @property
+    def columns(self) -> List[str]:
+        """
+        names of the data columns
+        """
+        return list(self.data.columns)
 
-        # set dmdt configuration
-        dmdt_settings = dict(
-            wsize=3.0,
-            lsq_method=LSQMethod.weighted,
-            truncate=False,
-            tapering=True,
+    @property
+    def num_records(self) -> int:
+        return len(self.data)
+
+    def digest(self) -> str:
+        """
+        hash of the properties and data of the series
+        """
+        digest = hashlib.sha256(
+            repr(
+                (
+                    self.data_format,
+                    self.contributor,
+                    self.experiment_group,
+                    self.basin_id,
+                    self.basin_group,
+                    self.computed,
+                )
+            ).encode()
         )
+        for name in self.columns:
+            values = np.ascontiguousarray(self.column(name))
+            digest.update(f"{name}:{values.dtype.str}:".encode())
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        get the values of a data column as a numpy array
+        """
+        values = self.data[name]
+        if isinstance(values, pd.Series):
+            return values.to_numpy()
+        return values
+
+    def make_data(
+        self, columns: Dict[str, np.ndarray]
+    ) -> Union[pd.DataFrame, ColumnStore]:
+        """
+        create new series data using the same storage as this series
+        """
+        if isinstance(self.data, ColumnStore):
+            return ColumnStore.from_columns(columns, self.data.dtype)
+        return pd.DataFrame(columns)
+
+    def dmdt_state(self, previous: DmdtState = None) -> DmdtState:
+        """
+        convert dm data to dmdt, keeping the state of the conversion.
+        if the state of a previous version of this series is given,
+        only records appended since then are processed. the state is
+        stored with the result of to_dmdt, so only one conversion is made
+        """
+        _, state = self._dmdt(previous)
+        return state
+
+    def clear_cache(self) -> None:
+        """
+        discard stored conversion results
+        """
+        DERIVED.discard_if(lambda key: key[0] is self._key)
+
+    def to_dmdt(self, previous: DmdtState = None) -> "Series":
+        series, _ = self._dmdt(previous)
+        return series
+
+    def _dmdt(self, previous: DmdtState = None) -> Tuple["Series", DmdtState]:
+        # the previous state only saves work, the result is the same
+        key = (self._key, "dmdt", tuple(DMDT_SETTINGS.items()))
+        return DERIVED.get(key, lambda: self._to_dmdt(previous))
+
+    def _to_dmdt(self, previous: DmdtState = None) -> Tuple["Series", DmdtState]:
+        assert self.data_format == "dm", "series already contains dmdt data"
+
+        t = self.column("date")
+        dm = self.column("dm")
+        dm_sd = self.column("dm_sd")
+
+        if previous is not None and all(
+            previous.settings.get(key) == value for key, value in DMDT_SETTINGS.items()
+        ):
+            state = previous.update(t, dm, dm_sd)
+        else:
+            state = DmdtState.create(t, dm, dm_sd, **DMDT_SETTINGS)
 
         dmdt_data = self.data.copy()
-        dmdt_data["date"], dmdt_data["dmdt"], dmdt_data["dmdt_sd"] = dm_to_dmdt(
-            self.data["date"].values,
-            self.data["dm"].values,
-            self.data["dm_sd"].values,
-            **dmdt_settings,
-        )
-        dmdt_data.drop("dm", axis=1)
-        dmdt_data.drop("dm_sd", axis=1)
+        dmdt_data["date"] = state.tout
+        dmdt_data["dmdt"] = state.dmdt
+        dmdt_data["dmdt_sd"] = state.sigma_dmdt
 
-        return Series(
+        series = Series(
             dmdt_data,
             "dmdt",
             self.contributor,
@@ -71,31 +165,34 @@ class Series:
             self.basin_group,
             computed=True,
         )
+        return series, state
 
     def to_dm(self) -> "Series":
+        return DERIVED.get((self._key, "dm"), self._to_dm)
+
+    def _to_dm(self) -> "Series":
         assert self.data_format != "dm", "series already contains dm data"
 
         # dm_data = self.data.copy()
 
-        if "date_0" in self.data.columns:
-            dates = np.hstack([self.data.date_0.values[0], self.data.date_1.values])
-            diffs = np.diff(dates)
-            dm = np.hstack([0, np.cumsum(self.data.dmdt.values) * diffs])
+        dmdt = self.column("dmdt")
+        dmdt_sd = self.column("dmdt_sd")
 
-            dm_sd = np.sqrt(
-                np.cumsum(
-                    np.hstack([self.data.dmdt_sd.values[0], self.data.dmdt_sd.values])
-                )
-            ) * np.sqrt(np.hstack([1, diffs]))
-        else:
-            dates = self.data.date.values
+        if "date_0" in self.columns:
+            dates = np.hstack([self.column("date_0")[0], self.column("date_1")])
             diffs = np.diff(dates)
-            dm = np.cumsum(self.data.dmdt.values) * np.hstack([0, diffs])
-            dm_sd = np.sqrt(np.cumsum(self.data.dmdt_sd.values)) * np.sqrt(
+            dm = np.hstack([0, np.cumsum(dmdt) * diffs])
+
+            dm_sd = np.sqrt(np.cumsum(np.hstack([dmdt_sd[0], dmdt_sd]))) * np.sqrt(
                 np.hstack([1, diffs])
             )
+        else:
+            dates = self.column("date")
+            diffs = np.diff(dates)
+            dm = np.cumsum(dmdt) * np.hstack([0, diffs])
+            dm_sd = np.sqrt(np.cumsum(dmdt_sd)) * np.sqrt(np.hstack([1, diffs]))
 
-        dm_data = pd.DataFrame(
+        dm_data = self.make_data(
             {
                 "date": dates,
                 "dm": dm,
@@ -121,15 +218,18 @@ class Series:
         )
 
     def get_statistics(self) -> SeriesStatistics:
-        if "date_0" in self.data.columns:
-            series_start = self.data.date_0.min()
-            series_stop = self.data.date_1.max()
+        return DERIVED.get((self._key, "statistics"), self._get_statistics)
+
+    def _get_statistics(self) -> SeriesStatistics:
+        if "date_0" in self.columns:
+            series_start = self.column("date_0").min()
+            series_stop = self.column("date_1").max()
 
         else:
-            series_start = self.data.date.min()
-            series_stop = self.data.date.max()
+            series_start = self.column("date").min()
+            series_stop = self.column("date").max()
 
-        num_records = self.data.index.size
+        num_records = self.num_records
 
         start = decimal_year_to_datetime(series_start)
         stop = decimal_year_to_datetime(series_stop)
@@ -138,7 +238,7 @@ class Series:
 
         value_column = "dmdt" if self.data_format == "dmdt" else "dm"
         # error_column = f"{value_column}_sd"
-        values = self.data[value_column].values
+        values = self.column(value_column)
 
         if self.data_format == "dmdt":
             mean_dmdt = np.nanmean(values)
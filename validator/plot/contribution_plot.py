@@ -128,22 +128,22 @@ def contribution_plot(contribution: Contribution):
                 ax.set_ylabel(YLABELS[fmt])
 
             if series:
-                if "date_0" in series.data.columns:
-                    x0 = series.data["date_0"].values
-                    x1 = series.data["date_1"].values
-                    y = series.data["dmdt"].values
-                    yerr = series.data["dmdt_sd"].values
+                if "date_0" in series.columns:
+                    x0 = series.column("date_0")
+                    x1 = series.column("date_1")
+                    y = series.column("dmdt")
+                    yerr = series.column("dmdt_sd")
 
                     plot_single_dmdt(ax, x0, x1, y, yerr, color=col)
                 else:
-                    x = series.data["date"]
-                    y = series.data[fmt]
-                    yerr = series.data[f"{fmt}_sd"]
+                    x = series.column("date")
+                    y = series.column(fmt)
+                    yerr = series.column(f"{fmt}_sd")
                     plot_single(ax, x, y, yerr, color=col)
                 ymin, ymax = ax.get_ylim()
                 yrange = ymax - ymin
 
-                min_yrange = 10 * np.nanmean(series.data[f"{fmt}_sd"])
+                min_yrange = 10 * np.nanmean(series.column(f"{fmt}_sd"))
                 if yrange < min_yrange:
                     ymid = (ymax + ymin) / 2
                     ymin = ymid - (min_yrange / 2)
@@ -1,4 +1,16 @@
-from .dm_to_dmdt import dm_to_dmdt
+from .dm_to_dmdt import dm_to_dmdt, dm_to_dmdt_diagnostics
+from .batch import RaggedSeries, dm_to_dmdt_batch
+from .diagnostics import FitDiagnostics
+from .incremental import DmdtState
+from .sweep import dm_to_dmdt_sweep
 
 
-__all__ = ["dm_to_dmdt"]
+__all__ = [
+    "dm_to_dmdt",
+    "dm_to_dmdt_diagnostics",
+    "dm_to_dmdt_batch",
+    "dm_to_dmdt_sweep",
+    "DmdtState",
+    "RaggedSeries",
+    "FitDiagnostics",
+]
@@ -0,0 +1,214 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Tuple
+import numpy as np
+
+from validator.helpers.ragged_searchsorted import ragged_searchsorted
+
+from .cumulative import fit_windows, window_sums
+from .dm_to_dmdt import CUMULATIVE_METHODS, LSQMethod, dm_to_dmdt
+from .window_index import window_extents
+
+
+@dataclass(frozen=True)
+class RaggedSeries:
+    """
+    many time series stored end-to-end in shared arrays.
+    records `offsets[k]:offsets[k + 1]` belong to series k
+    """
+
+    t: np.ndarray
+    values: np.ndarray
+    errors: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_arrays(
+        cls, series: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    ) -> "RaggedSeries":
+        """
+        pack a sequence of (t, values, errors) arrays
+        """
+        series = list(series)
+        lengths = [np.size(t) for t, *_ in series]
+        offsets = np.zeros(len(series) + 1, dtype=np.intp)
+        np.cumsum(lengths, out=offsets[1:])
+
+        def concat(i: int) -> np.ndarray:
+            if not series:
+                return np.empty(0, dtype=np.float64)
+            return np.concatenate([np.asarray(s[i], dtype=np.float64) for s in series])
+
+        return cls(concat(0), concat(1), concat(2), offsets)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def segment(self) -> np.ndarray:
+        """
+        index of the series each record belongs to
+        """
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def __len__(self) -> int:
+        return self.offsets.size - 1
+
+    def __getitem__(self, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        part = slice(self.offsets[k], self.offsets[k + 1])
+        return self.t[part], self.values[part], self.errors[part]
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        for k in range(len(self)):
+            yield self[k]
+
+
+def dm_to_dmdt_batch(
+    series: RaggedSeries,
+    wsize: float,
+    truncate: bool = True,
+    lsq_method: LSQMethod = LSQMethod.normal,
+    tapering: bool = False,
+    min_tapering: float = 0.75,
+    jobs: int = None,
+) -> RaggedSeries:
+    """
+    create dmdt time series from many dm series sharing the same settings.
+
+    the result has the same layout as the input, with dmdt values at the
+    input postings. cumulative fitting methods convert every series in
+    one vectorised pass; other methods convert each series separately,
+    in a pool of `jobs` processes if more than one is requested
+    """
+    # prevent user from applying conflicting options
+    assert not (truncate and tapering), "conflicting options specified"
+
+    settings = dict(
+        wsize=wsize,
+        truncate=truncate,
+        lsq_method=lsq_method,
+        tapering=tapering,
+        min_tapering=min_tapering,
+    )
+
+    if lsq_method in CUMULATIVE_METHODS:
+        return _cumulative_batch(series, **settings)
+
+    if jobs is not None and jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_convert, *s, **settings) for s in series]
+            results = [f.result() for f in futures]
+    else:
+        results = [_convert(*s, **settings) for s in series]
+
+    return RaggedSeries.from_arrays(results)
+
+
+def _convert(
+    t: np.ndarray, dm: np.ndarray, sigma_dm: np.ndarray, **settings
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    convert a single series, passing empty series through
+    """
+    if not t.size:
+        return t, dm, sigma_dm
+    return dm_to_dmdt(t, dm, sigma_dm, **settings)
+
+
+def _segment_reduce(
+    func: np.ufunc, values: np.ndarray, series: RaggedSeries
+) -> np.ndarray:
+    """
+    apply a reduction to each non-empty series, giving NaN for empty ones
+    """
+    out = np.full(len(series), np.nan)
+    filled = series.lengths > 0
+    out[filled] = func.reduceat(values, series.offsets[:-1][filled])
+    return out
+
+
+def _cumulative_batch(
+    series: RaggedSeries,
+    wsize: float,
+    truncate: bool,
+    lsq_method: LSQMethod,
+    tapering: bool,
+    min_tapering: float,
+) -> RaggedSeries:
+    """
+    convert all series at once with the prefix-sum fitting engine
+    """
+    segment = series.segment
+
+    # order each series by time, keeping series contiguous
+    order = np.lexsort((series.t, segment))
+    t = series.t[order]
+    dm = series.values[order]
+    sigma_dm = series.errors[order]
+
+    # remove the mean of each series to limit cancellation in the sums
+    t_mean = _segment_reduce(np.add, t, series) / series.lengths
+    dm_mean = _segment_reduce(np.add, np.nan_to_num(dm), series) / series.lengths
+    t_centred = t - np.repeat(t_mean, series.lengths)
+    dm_centred = dm - np.repeat(dm_mean, series.lengths)
+
+    # output postings are the (unsorted) input postings
+    t_range = (
+        np.repeat(_segment_reduce(np.minimum, t, series), series.lengths),
+        np.repeat(_segment_reduce(np.maximum, t, series), series.lengths),
+    )
+    tout = series.t
+    wmin, wmax = window_extents(
+        t,
+        tout,
+        wsize,
+        truncate,
+        tapering,
+        min_tapering,
+        t_range=t_range,
+        tout_range=t_range,
+    )
+    start = ragged_searchsorted(t, segment, wmin, segment)
+    stop = ragged_searchsorted(t, segment, wmax, segment)
+
+    sums = window_sums(t_centred, dm_centred, sigma_dm, CUMULATIVE_METHODS[lsq_method])
+    dmdt, slope_se, rms_sigma = fit_windows(sums, start, stop)
+    sigma_dmdt = np.sqrt(slope_se**2 + rms_sigma**2)
+
+    if tapering:
+        tout_min, tout_max = t_range
+        # 6-month periods to overwrite values, and 12-month
+        #  periods from which to calculate averages
+        head = (tout <= tout_min + 0.5, tout <= tout_min + 1.0)
+        tail = (tout >= tout_max - 0.5, tout >= tout_max - 1.0)
+
+        for i_overwrite, i_average in (head, tail):
+            _taper_segments(
+                segment, len(series), i_overwrite, i_average, dmdt, sigma_dmdt
+            )
+
+    return RaggedSeries(tout, dmdt, sigma_dmdt, series.offsets)
+
+
+def _taper_segments(
+    segment: np.ndarray,
+    n_segments: int,
+    i_overwrite: np.ndarray,
+    i_average: np.ndarray,
+    dmdt: np.ndarray,
+    sigma_dmdt: np.ndarray,
+) -> None:
+    """
+    overwrite the end postings of each series with the mean
+    of the surrounding year (in-place)
+    """
+    for values in (dmdt, sigma_dmdt):
+        use = i_average & np.isfinite(values)
+        total = np.bincount(
+            segment, weights=np.where(use, values, 0.0), minlength=n_segments
+        )
+        count = np.bincount(segment, weights=use, minlength=n_segments)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+        values[i_overwrite] = mean[segment[i_overwrite]]
@@ -0,0 +1,187 @@
+from dataclasses import dataclass
+from typing import Tuple
+import numpy as np
+
+
+@dataclass(frozen=True)
+class WindowSums:
+    """
+    prefix sums of the weighted least-squares terms of a dm series.
+
+    each array has one more element than the input series, so that the
+    sum over records [i, j) is `s[j] - s[i]`. time and dm values are
+    offset by `t0` and `dm0` to limit cancellation in the sums.
+    """
+
+    t0: float
+    dm0: float
+    w: np.ndarray
+    wt: np.ndarray
+    wtt: np.ndarray
+    wdm: np.ndarray
+    wtdm: np.ndarray
+    wdmdm: np.ndarray
+    sigma2: np.ndarray
+    n_sigma: np.ndarray
+    n_invalid: np.ndarray
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    """
+    cumulative sum with a leading zero
+    """
+    out = np.zeros(values.size + 1, dtype=np.float64)
+    np.cumsum(values, out=out[1:])
+    return out
+
+
+def window_sums(
+    t: np.ndarray, dm: np.ndarray, sigma_dm: np.ndarray, weighted: bool
+) -> WindowSums:
+    """
+    accumulate the prefix sums required to fit any contiguous window of
+    a sorted dm series.
+
+    weights follow the `lscov` path of `dm_to_dmdt`, which passes
+    1/sigma^2 as the covariance argument: weighted fits therefore use
+    sigma^2 as the weight of each record.
+    """
+    t, dm, sigma_dm, w, invalid = _weights(t, dm, sigma_dm, weighted)
+
+    t0 = np.mean(t[~invalid]) if not invalid.all() else 0.0
+    dm0 = np.mean(dm[~invalid]) if not invalid.all() else 0.0
+
+    return _sums(t, dm, sigma_dm, w, invalid, t0, dm0)
+
+
+def extend_sums(
+    sums: WindowSums,
+    t: np.ndarray,
+    dm: np.ndarray,
+    sigma_dm: np.ndarray,
+    weighted: bool,
+) -> WindowSums:
+    """
+    prefix sums of a sorted series with records appended, from the sums
+    of the original series. only the new records are summed, using the
+    offsets of the original sums
+    """
+    new = _sums(*_weights(t, dm, sigma_dm, weighted), sums.t0, sums.dm0)
+    return WindowSums(
+        sums.t0,
+        sums.dm0,
+        *[
+            np.concatenate([old, added[1:] + old[-1]])
+            for old, added in [
+                (sums.w, new.w),
+                (sums.wt, new.wt),
+                (sums.wtt, new.wtt),
+                (sums.wdm, new.wdm),
+                (sums.wtdm, new.wtdm),
+                (sums.wdmdm, new.wdmdm),
+                (sums.sigma2, new.sigma2),
+                (sums.n_sigma, new.n_sigma),
+                (sums.n_invalid, new.n_invalid),
+            ]
+        ],
+    )
+
+
+def _weights(
+    t: np.ndarray, dm: np.ndarray, sigma_dm: np.ndarray, weighted: bool
+) -> Tuple[np.ndarray, ...]:
+    """
+    weight of each record, and whether it is invalid
+    """
+    t = np.asarray(t, dtype=np.float64)
+    dm = np.asarray(dm, dtype=np.float64)
+    sigma_dm = np.asarray(sigma_dm, dtype=np.float64)
+
+    w = np.square(sigma_dm) if weighted else np.ones_like(t)
+
+    # records which would turn an lscov fit into NaN
+    invalid = ~(np.isfinite(t) & np.isfinite(dm) & np.isfinite(w))
+    w = np.where(invalid, 0.0, w)
+
+    return t, dm, sigma_dm, w, invalid
+
+
+def _sums(
+    t: np.ndarray,
+    dm: np.ndarray,
+    sigma_dm: np.ndarray,
+    w: np.ndarray,
+    invalid: np.ndarray,
+    t0: float,
+    dm0: float,
+) -> WindowSums:
+    tc = np.where(invalid, 0.0, t - t0)
+    dmc = np.where(invalid, 0.0, dm - dm0)
+
+    has_sigma = np.isfinite(sigma_dm)
+    sigma2 = np.where(has_sigma, np.square(sigma_dm), 0.0)
+
+    return WindowSums(
+        t0,
+        dm0,
+        w=_prefix(w),
+        wt=_prefix(w * tc),
+        wtt=_prefix(w * tc * tc),
+        wdm=_prefix(w * dmc),
+        wtdm=_prefix(w * tc * dmc),
+        wdmdm=_prefix(w * dmc * dmc),
+        sigma2=_prefix(sigma2),
+        n_sigma=_prefix(has_sigma),
+        n_invalid=_prefix(invalid),
+    )
+
+
+def fit_windows(
+    sums: WindowSums,
+    start: np.ndarray,
+    stop: np.ndarray,
+    intercept_out: np.ndarray = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    fit a straight line to each window [start, stop) of a series.
+
+    returns the slope, its standard error and the RMS of the input
+    dm errors of every window. windows with fewer than two records, or
+    containing invalid records, produce NaN values. the intercept of
+    each line is written to `intercept_out`, if provided.
+    """
+    start = np.asarray(start, dtype=np.intp)
+    stop = np.asarray(stop, dtype=np.intp)
+
+    def window(s: np.ndarray) -> np.ndarray:
+        return s[stop] - s[start]
+
+    n = (stop - start).astype(np.float64)
+    s_w = window(sums.w)
+    s_t = window(sums.wt)
+    s_tt = window(sums.wtt)
+    s_dm = window(sums.wdm)
+    s_tdm = window(sums.wtdm)
+    s_dmdm = window(sums.wdmdm)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        det = s_w * s_tt - s_t * s_t
+        slope = (s_w * s_tdm - s_t * s_dm) / det
+        intercept = (s_dm - slope * s_t) / s_w
+
+        # weighted residual sum of squares of the fitted line
+        rss = s_dmdm - intercept * s_dm - slope * s_tdm
+        mse = np.maximum(rss, 0.0) / (n - 2)
+        slope_se = np.sqrt(s_w / det * mse)
+
+        rms_sigma = np.sqrt(window(sums.sigma2) / window(sums.n_sigma))
+
+    unusable = (n < 2) | (window(sums.n_invalid) > 0)
+    slope[unusable] = np.nan
+    slope_se[unusable | (n < 3)] = np.nan
+
+    if intercept_out is not None:
+        # undo the offsets applied to the summed values
+        intercept_out[:] = sums.dm0 + intercept - slope * sums.t0
+
+    return slope, slope_se, rms_sigma
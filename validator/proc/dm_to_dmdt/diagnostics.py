@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Tuple
+import numpy as np
+
+
+@dataclass(frozen=True)
+class FitDiagnostics:
+    """
+    details of the window fits made by dm_to_dmdt. the sorted input
+    series and the window offsets are kept, and fit lines and residuals
+    are only evaluated when requested
+    """
+
+    t: np.ndarray
+    dm: np.ndarray
+    tout: np.ndarray
+    wmin: np.ndarray
+    wmax: np.ndarray
+    start: np.ndarray
+    stop: np.ndarray
+    intercept: np.ndarray
+    slope: np.ndarray
+
+    @property
+    def n_records(self) -> np.ndarray:
+        """
+        number of input records used by each window
+        """
+        return self.stop - self.start
+
+    def window(self, i: int) -> slice:
+        """
+        get the slice of the sorted input used by window i
+        """
+        return slice(self.start[i], self.stop[i])
+
+    def fit_line(self, i: int, step: float = 0.2) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        sample the fitted line of window i across its extent
+        """
+        if not np.isfinite(self.slope[i]):
+            return np.empty(0), np.empty(0)
+
+        t = np.r_[self.wmin[i] : self.wmax[i] : step]
+        return t, self.intercept[i] + self.slope[i] * t
+
+    def residuals(self, i: int) -> np.ndarray:
+        """
+        get the dm residuals of the records in window i
+        """
+        window = self.window(i)
+        return self.dm[window] - (self.intercept[i] + self.slope[i] * self.t[window])
+
+    @cached_property
+    def rms_residuals(self) -> np.ndarray:
+        """
+        RMS residual of every window, NaN where no fit was made
+        """
+        rms = np.full(self.tout.shape, np.nan)
+        for i in np.flatnonzero(np.isfinite(self.slope)):
+            rms[i] = np.sqrt(np.mean(np.square(self.residuals(i))))
+        return rms
@@ -1,107 +1,75 @@
-from typing import Tuple
+from typing import Optional, Tuple
 import numpy as np
 from enum import Enum
 
-from .lscov import lscov
+from .cumulative import WindowSums, fit_windows, window_sums
+from .diagnostics import FitDiagnostics
+from .lscov import lscov_diag
+from .window_index import sort_series, window_extents, window_index
 
 
 class LSQMethod(Enum):
     normal = "NORMAL"
     regress = "REGRESS"
     weighted = "WEIGHTED"
+    cumulative_normal = "CUMULATIVE_NORMAL"
+    cumulative_weighted = "CUMULATIVE_WEIGHTED"
 
 
-def dm_to_dmdt(
+# methods which fit every window from prefix sums of the series
+CUMULATIVE_METHODS = {
+    LSQMethod.cumulative_normal: False,
+    LSQMethod.cumulative_weighted: True,
+}
+
+
+def cumulative_dm_to_dmdt(
     t: np.ndarray,
     dm: np.ndarray,
     sigma_dm: np.ndarray,
-    wsize: float,
-    tout: np.ndarray = None,
-    truncate: bool = True,
-    debug: bool = False,
-    lsq_method: LSQMethod = LSQMethod.normal,
-    tapering: bool = False,
-    min_tapering: float = 0.75,
-) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    start: np.ndarray,
+    stop: np.ndarray,
+    weighted: bool,
+    intercept: np.ndarray = None,
+    sums: WindowSums = None,
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    create dmdt time series from dm data
+    fit every window from prefix sums of the sorted series, so that the
+    whole conversion costs O(n) rather than one least-squares solve per
+    posting. the sums are calculated, unless given
     """
-    # prevent user from applying conflicting options
-    assert not (truncate and tapering), "conflicting options specified"
+    if sums is None:
+        sums = window_sums(t, dm, sigma_dm, weighted)
+    slope, slope_se, rms_sigma = fit_windows(sums, start, stop, intercept)
 
-    # output postings are optional, produce records at
-    #  same postings as input if not provided
-    if tout is None:
-        tout = t
+    return slope, np.sqrt(slope_se**2 + rms_sigma**2)
 
+
+def lscov_dm_to_dmdt(
+    t: np.ndarray,
+    dm: np.ndarray,
+    sigma_dm: np.ndarray,
+    start: np.ndarray,
+    stop: np.ndarray,
+    lsq_method: LSQMethod,
+    intercept: np.ndarray = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    fit each window of the sorted series with a separate lscov solve.
+    the intercept of each fit is stored in `intercept`, if provided
+    """
     # create empty data structures
-    dmdt = np.empty(tout.shape, dtype=t.dtype) * np.nan
-    sigma_dmdt = np.empty(tout.shape, dtype=t.dtype) * np.nan
-    model_fit_t = [None for _ in tout]
-    model_fit_dm = [None for _ in tout]
-    n_records_fitting = [0 for _ in tout]
-
-    # size of half the window
-    w_halfsize = wsize / 2.0
-
-    # get start and end times of input series
-    tmin = np.min(t)
-    tmax = np.max(t)
-
-    # iterate accross time series and apply window fitting
-    for i, it in enumerate(tout):
-        if it < tmin or it > tmax:
-            continue
-
-        # calc. extents of fitting window
-        wmin = it - w_halfsize
-        wmax = it + w_halfsize
-
-        # check if window overlaps data boundaries
-        if wmin < tmin or wmax > tmax:
-
-            if truncate:
-                # truncate mode: clip the output series
-                #  to avoid producing values from incomplete
-                #  windows
-                dmdt[i] = np.nan
-                sigma_dmdt[i] = np.nan
-                continue
-
-            elif tapering:
-                # tapering mode: reduce size of window
-                #  near the ends of the time series in
-                #  order to maintain a symetrical window.
-                #  we later replace the dmdt values at the
-                #  first and last 6-month postings with the
-                #  mean values for that year
-                w_tapered = min(tout.max() - it, it - tout.min())
-                if min_tapering is not None and w_tapered < min_tapering:
-                    w_tapered = min_tapering
-                wmin = it - w_tapered
-                wmax = it + w_tapered
-
-                in_window, *_ = np.logical_and(t >= wmin, t < wmax).nonzero()
-
-                if in_window.size < 2:
-                    dmdt[i] = np.nan
-                    sigma_dmdt[i] = np.nan
-                    continue
-
-            else:
-                # otherwise get the portion of the window that is valid
-                trunc_wmin = max(wmin, tmin)
-                trunc_wmax = min(wmax, tmax)
-
-                in_window = np.logical_and(t >= trunc_wmin, t < trunc_wmax).nonzero()
-        else:
-            # create index array for current window
-            in_window = np.logical_and(t >= wmin, t < wmax).nonzero()
+    dmdt = np.empty(start.shape, dtype=t.dtype) * np.nan
+    sigma_dmdt = np.empty(start.shape, dtype=t.dtype) * np.nan
+
+    # iterate accross windows containing enough records to fit
+    for i in np.flatnonzero(stop - start >= 2):
+        window = slice(start[i], stop[i])
 
         # get time, dm and error values within the current window
-        window_t = t[in_window]
-        window_dm = dm[in_window]
-        window_sigma_dm = sigma_dm[in_window]
+        window_t = t[window]
+        window_dm = dm[window]
+        window_sigma_dm = sigma_dm[window]
 
         # prepare input for fitting
         lsq_fit = np.vstack([np.ones_like(window_t), window_t]).T
@@ -111,51 +79,167 @@ def dm_to_dmdt(
             raise NotImplementedError()
         elif lsq_method == LSQMethod.normal:
             # normal LSQ fitting method
-            lsq_coef, lsq_se = lscov(lsq_fit, window_dm, dx=True)
+            lsq_coef, lsq_se = lscov_diag(lsq_fit, window_dm, dx=True)
         elif lsq_method == LSQMethod.weighted:
             # error-weighted LSQ fitting
-            w = np.diag(1.0 / np.square(window_sigma_dm))
-            lsq_coef, lsq_se = lscov(lsq_fit, window_dm, w, dx=True)
+            v = 1.0 / np.square(window_sigma_dm)
+            lsq_coef, lsq_se = lscov_diag(lsq_fit, window_dm, v, dx=True)
 
         # get RMS of input dm errors within window
-        avg_window_sigma = np.sqrt(np.nanmean(window_sigma_dm ** 2.0))
+        avg_window_sigma = np.sqrt(np.nanmean(window_sigma_dm**2.0))
 
         # get output dmdt and error values
         dmdt[i] = lsq_coef[1]
-        sigma_dmdt[i] = np.sqrt(lsq_se[1] ** 2 + avg_window_sigma ** 2)
+        sigma_dmdt[i] = np.sqrt(lsq_se[1] ** 2 + avg_window_sigma**2)
 
-        # store data for debugging plot
-        model_fit_t[i] = np.r_[wmin:wmax:0.2]
-        model_fit_dm[i] = lsq_coef[0] + lsq_coef[1] * model_fit_t[i]
-        n_records_fitting[i] = window_t.size
+        if intercept is not None:
+            intercept[i] = lsq_coef[0]
+
+    return dmdt, sigma_dmdt
 
-    if tapering:
-        # 6-month period to overwrite values
-        i_overwrite = tout <= tout.min() + 0.5
-        # 12-month period from which to calculate
-        #  averages
-        i_average = tout <= tout.min() + 1.0
-
-        # calc. averages
-        mean_dmdt = np.nanmean(dmdt[i_average])
-        mean_sigma = np.nanmean(sigma_dmdt[i_average])
-
-        # apply values
-        dmdt[i_overwrite] = mean_dmdt
-        sigma_dmdt[i_overwrite] = mean_sigma
-
-        # 6-month period to overwrite values
-        i_overwrite = tout >= tout.max() - 0.5
-        # 12-month period from which to calculate
-        #  averages
-        i_average = tout >= tout.max() - 1.0
-
-        # calc. averages
-        mean_dmdt = np.nanmean(dmdt[i_average])
-        mean_sigma = np.nanmean(sigma_dmdt[i_average])
-
-        # apply values
-        dmdt[i_overwrite] = mean_dmdt
-        sigma_dmdt[i_overwrite] = mean_sigma
 
+def dm_to_dmdt(
+    t: np.ndarray,
+    dm: np.ndarray,
+    sigma_dm: np.ndarray,
+    wsize: float,
+    tout: np.ndarray = None,
+    truncate: bool = True,
+    debug: bool = False,
+    lsq_method: LSQMethod = LSQMethod.normal,
+    tapering: bool = False,
+    min_tapering: float = 0.75,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    create dmdt time series from dm data.
+
+    `debug` has no effect: use dm_to_dmdt_diagnostics for details
+    of the window fits
+    """
+    tout, dmdt, sigma_dmdt, _ = _dm_to_dmdt(
+        t, dm, sigma_dm, wsize, tout, truncate, lsq_method, tapering, min_tapering
+    )
     return tout, dmdt, sigma_dmdt
+
+
+def dm_to_dmdt_diagnostics(
+    t: np.ndarray,
+    dm: np.ndarray,
+    sigma_dm: np.ndarray,
+    wsize: float,
+    tout: np.ndarray = None,
+    truncate: bool = True,
+    lsq_method: LSQMethod = LSQMethod.normal,
+    tapering: bool = False,
+    min_tapering: float = 0.75,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, FitDiagnostics]:
+    """
+    create dmdt time series from dm data, as dm_to_dmdt, along with a
+    FitDiagnostics object describing the window fits
+    """
+    return _dm_to_dmdt(
+        t,
+        dm,
+        sigma_dm,
+        wsize,
+        tout,
+        truncate,
+        lsq_method,
+        tapering,
+        min_tapering,
+        diagnostics=True,
+    )
+
+
+def _dm_to_dmdt(
+    t: np.ndarray,
+    dm: np.ndarray,
+    sigma_dm: np.ndarray,
+    wsize: float,
+    tout: np.ndarray,
+    truncate: bool,
+    lsq_method: LSQMethod,
+    tapering: bool,
+    min_tapering: float,
+    diagnostics: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[FitDiagnostics]]:
+    """
+    convert a dm series, describing the window fits if required
+    """
+    # prevent user from applying conflicting options
+    assert not (truncate and tapering), "conflicting options specified"
+
+    # output postings are optional, produce records at
+    #  same postings as input if not provided
+    if tout is None:
+        tout = t
+
+    # calc. extents of fitting window for each posting
+    wmin, wmax = window_extents(t, tout, wsize, truncate, tapering, min_tapering)
+
+    # order the input once, so that every window is a
+    #  contiguous slice of the series
+    t, dm, sigma_dm = sort_series(t, dm, sigma_dm)
+    start, stop = window_index(t, wmin, wmax)
+
+    # only keep the fit intercepts for diagnostics
+    intercept = np.full(tout.shape, np.nan) if diagnostics else None
+
+    if lsq_method in CUMULATIVE_METHODS:
+        dmdt, sigma_dmdt = cumulative_dm_to_dmdt(
+            t, dm, sigma_dm, start, stop, CUMULATIVE_METHODS[lsq_method], intercept
+        )
+        dmdt = dmdt.astype(t.dtype)
+        sigma_dmdt = sigma_dmdt.astype(t.dtype)
+    else:
+        dmdt, sigma_dmdt = lscov_dm_to_dmdt(
+            t, dm, sigma_dm, start, stop, lsq_method, intercept
+        )
+
+    fits = None
+    if diagnostics:
+        fits = FitDiagnostics(
+            t, dm, tout, wmin, wmax, start, stop, intercept, dmdt.copy()
+        )
+
+    if tapering:
+        # tapering mode: we replace the dmdt values at the
+        #  first and last 6-month postings with the mean
+        #  values for that year
+        taper_ends(tout, dmdt, sigma_dmdt)
+
+    return tout, dmdt, sigma_dmdt, fits
+
+
+def taper_ends(tout: np.ndarray, dmdt: np.ndarray, sigma_dmdt: np.ndarray) -> None:
+    """
+    replace the dmdt values at the first and last 6-month
+    postings with the mean values for that year (in-place)
+    """
+    # 6-month period to overwrite values
+    i_overwrite = tout <= tout.min() + 0.5
+    # 12-month period from which to calculate
+    #  averages
+    i_average = tout <= tout.min() + 1.0
+
+    # calc. averages
+    mean_dmdt = np.nanmean(dmdt[i_average])
+    mean_sigma = np.nanmean(sigma_dmdt[i_average])
+
+    # apply values
+    dmdt[i_overwrite] = mean_dmdt
+    sigma_dmdt[i_overwrite] = mean_sigma
+
+    # 6-month period to overwrite values
+    i_overwrite = tout >= tout.max() - 0.5
+    # 12-month period from which to calculate
+    #  averages
+    i_average = tout >= tout.max() - 1.0
+
+    # calc. averages
+    mean_dmdt = np.nanmean(dmdt[i_average])
+    mean_sigma = np.nanmean(sigma_dmdt[i_average])
+
+    # apply values
+    dmdt[i_overwrite] = mean_dmdt
+    sigma_dmdt[i_overwrite] = mean_sigma
@@ -0,0 +1,339 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import numpy as np
+
+from .dm_to_dmdt import (
+    CUMULATIVE_METHODS,
+    LSQMethod,
+    cumulative_dm_to_dmdt,
+    lscov_dm_to_dmdt,
+    taper_ends,
+)
+from .cumulative import WindowSums, extend_sums, window_sums
+from .window_index import sort_series, window_extents, window_index
+
+
+@dataclass(frozen=True)
+class DmdtState:
+    """
+    result of a dm_to_dmdt conversion, along with the input series and
+    window fits needed to update it when records are appended
+    """
+
+    t: np.ndarray
+    dm: np.ndarray
+    sigma_dm: np.ndarray
+    tout: np.ndarray
+    settings: Dict[str, Any]
+    # postings are the input times, and grow with them
+    tout_follows_t: bool
+    # window extents and fits before the ends are tapered
+    wmin: np.ndarray
+    wmax: np.ndarray
+    fit_dmdt: np.ndarray
+    fit_sigma_dmdt: np.ndarray
+    # final output
+    dmdt: np.ndarray
+    sigma_dmdt: np.ndarray
+    # whether the input is in time order, and prefix sums of the sorted
+    #  input for the cumulative methods
+    is_sorted: bool = False
+    sums: Optional[WindowSums] = None
+
+    @classmethod
+    def create(
+        cls,
+        t: np.ndarray,
+        dm: np.ndarray,
+        sigma_dm: np.ndarray,
+        wsize: float,
+        tout: np.ndarray = None,
+        truncate: bool = True,
+        lsq_method: LSQMethod = LSQMethod.normal,
+        tapering: bool = False,
+        min_tapering: float = 0.75,
+    ) -> "DmdtState":
+        """
+        convert a dm series, as dm_to_dmdt, keeping the conversion state
+        """
+        # prevent user from applying conflicting options
+        assert not (truncate and tapering), "conflicting options specified"
+
+        settings = dict(
+            wsize=wsize,
+            truncate=truncate,
+            lsq_method=lsq_method,
+            tapering=tapering,
+            min_tapering=min_tapering,
+        )
+        return cls._convert(t, dm, sigma_dm, tout, tout is None, settings)
+
+    def append(
+        self,
+        t: np.ndarray,
+        dm: np.ndarray,
+        sigma_dm: np.ndarray,
+        tout: np.ndarray = None,
+    ) -> "DmdtState":
+        """
+        add new records to the input series. only postings whose windows
+        change or include the new records are fitted again; the tapered
+        ends are then recalculated.
+
+        if postings were provided for the original conversion, the full
+        set of new postings may be given in `tout`.
+        """
+        t = np.concatenate([self.t, t])
+        dm = np.concatenate([self.dm, dm])
+        sigma_dm = np.concatenate([self.sigma_dm, sigma_dm])
+
+        if self.tout_follows_t:
+            tout = t
+        elif tout is None:
+            tout = self.tout
+
+        n_prev = self.tout.size
+        if tout.size < n_prev or not np.array_equal(tout[:n_prev], self.tout):
+            # previous postings are not kept, start again
+            return self._convert(
+                t, dm, sigma_dm, tout, self.tout_follows_t, self.settings
+            )
+
+        n_old = self.t.size
+        new_t = t[n_old:]
+        if (
+            self.is_sorted
+            and np.all(new_t[1:] >= new_t[:-1])
+            and (n_old == 0 or new_t.size == 0 or new_t[0] >= self.t[-1])
+        ):
+            return self._extend(t, dm, sigma_dm, tout)
+
+        return self._convert(
+            t,
+            dm,
+            sigma_dm,
+            tout,
+            self.tout_follows_t,
+            self.settings,
+            previous=self,
+        )
+
+    def update(
+        self,
+        t: np.ndarray,
+        dm: np.ndarray,
+        sigma_dm: np.ndarray,
+        tout: np.ndarray = None,
+    ) -> "DmdtState":
+        """
+        convert a complete new version of the input series. if it extends
+        the previous input, only the appended records are processed
+        """
+        n_prev = self.t.size
+        extends = t.size >= n_prev and all(
+            np.array_equal(new[:n_prev], old, equal_nan=True)
+            for new, old in [(t, self.t), (dm, self.dm), (sigma_dm, self.sigma_dm)]
+        )
+        if extends:
+            return self.append(t[n_prev:], dm[n_prev:], sigma_dm[n_prev:], tout)
+
+        if not self.tout_follows_t and tout is None:
+            tout = self.tout
+        return self._convert(t, dm, sigma_dm, tout, self.tout_follows_t, self.settings)
+
+    def _extend(
+        self,
+        t: np.ndarray,
+        dm: np.ndarray,
+        sigma_dm: np.ndarray,
+        tout: np.ndarray,
+    ) -> "DmdtState":
+        """
+        convert the input with records appended after the previous ones
+        in time. the input stays sorted, so the prefix sums are extended
+        and only postings near the ends of the series, or new postings,
+        can have different windows or include new records
+        """
+        settings = self.settings
+        n_old = self.t.size
+        n_prev = self.tout.size
+        half = settings["wsize"] / 2.0
+
+        if n_old == 0:
+            return self._convert(t, dm, sigma_dm, tout, self.tout_follows_t, settings)
+
+        # postings whose windows were inside the previous input keep
+        #  them, as the input only extends at its end
+        changed = np.ones(tout.shape, dtype=bool)
+        old = self.tout
+        changed[:n_prev] = (old - half < t[0]) | (old + half > self.t[-1])
+        refit = np.flatnonzero(changed)
+
+        wmin = np.concatenate([self.wmin, np.empty(tout.size - n_prev)])
+        wmax = np.concatenate([self.wmax, np.empty(tout.size - n_prev)])
+        wmin[refit], wmax[refit] = window_extents(
+            t,
+            tout[refit],
+            settings["wsize"],
+            settings["truncate"],
+            settings["tapering"],
+            settings["min_tapering"],
+            t_range=(t[0], t[-1]),
+            tout_range=(tout.min(), tout.max()),
+        )
+        start, stop = window_index(t, wmin[refit], wmax[refit])
+
+        fit_dmdt = np.concatenate([self.fit_dmdt, np.empty(tout.size - n_prev)])
+        fit_sigma_dmdt = np.concatenate(
+            [self.fit_sigma_dmdt, np.empty(tout.size - n_prev)]
+        )
+
+        lsq_method = settings["lsq_method"]
+        sums = None
+        if lsq_method in CUMULATIVE_METHODS:
+            weighted = CUMULATIVE_METHODS[lsq_method]
+            if self.sums is None:
+                sums = window_sums(t, dm, sigma_dm, weighted)
+            else:
+                sums = extend_sums(
+                    self.sums, t[n_old:], dm[n_old:], sigma_dm[n_old:], weighted
+                )
+            fitted = cumulative_dm_to_dmdt(
+                t, dm, sigma_dm, start, stop, weighted, sums=sums
+            )
+        else:
+            fitted = lscov_dm_to_dmdt(t, dm, sigma_dm, start, stop, lsq_method)
+        fit_dmdt[refit], fit_sigma_dmdt[refit] = fitted
+
+        dmdt = fit_dmdt.copy()
+        sigma_dmdt = fit_sigma_dmdt.copy()
+        if settings["tapering"]:
+            taper_ends(tout, dmdt, sigma_dmdt)
+
+        return DmdtState(
+            t,
+            dm,
+            sigma_dm,
+            tout,
+            settings,
+            self.tout_follows_t,
+            wmin,
+            wmax,
+            fit_dmdt,
+            fit_sigma_dmdt,
+            dmdt,
+            sigma_dmdt,
+            is_sorted=True,
+            sums=sums,
+        )
+
+    @classmethod
+    def _convert(
+        cls,
+        t: np.ndarray,
+        dm: np.ndarray,
+        sigma_dm: np.ndarray,
+        tout: np.ndarray,
+        tout_follows_t: bool,
+        settings: Dict[str, Any],
+        previous: "DmdtState" = None,
+    ) -> "DmdtState":
+        """
+        fit all windows, or only those affected by
+        appending records to the previous input
+        """
+        if tout is None:
+            tout = t
+
+        lsq_method = settings["lsq_method"]
+
+        wmin, wmax = window_extents(
+            t,
+            tout,
+            settings["wsize"],
+            settings["truncate"],
+            settings["tapering"],
+            settings["min_tapering"],
+        )
+
+        # mark records which were not part of the previous input
+        is_new = np.arange(t.size) >= (previous.t.size if previous else 0)
+        t_sorted, dm_sorted, sigma_dm_sorted, is_new = sort_series(
+            t, dm, sigma_dm, is_new
+        )
+        is_sorted = t_sorted is t
+        start, stop = window_index(t_sorted, wmin, wmax)
+
+        fit_dmdt = np.full(tout.shape, np.nan)
+        fit_sigma_dmdt = np.full(tout.shape, np.nan)
+
+        if previous is None:
+            refit = np.ones(tout.shape, dtype=bool)
+        else:
+            # refit postings which are new, whose windows have moved,
+            #  or whose windows include new records
+            n_prev = previous.tout.size
+            n_new = np.zeros(t.size + 1, dtype=np.intp)
+            np.cumsum(is_new, out=n_new[1:])
+
+            refit = n_new[stop] - n_new[start] > 0
+            refit[n_prev:] = True
+            refit[:n_prev] |= ~_same(wmin[:n_prev], previous.wmin)
+            refit[:n_prev] |= ~_same(wmax[:n_prev], previous.wmax)
+
+            keep = np.flatnonzero(~refit)
+            fit_dmdt[keep] = previous.fit_dmdt[keep]
+            fit_sigma_dmdt[keep] = previous.fit_sigma_dmdt[keep]
+
+        sums = None
+        if lsq_method in CUMULATIVE_METHODS:
+            weighted = CUMULATIVE_METHODS[lsq_method]
+            sums = window_sums(t_sorted, dm_sorted, sigma_dm_sorted, weighted)
+            fitted = cumulative_dm_to_dmdt(
+                t_sorted,
+                dm_sorted,
+                sigma_dm_sorted,
+                start[refit],
+                stop[refit],
+                weighted,
+                sums=sums,
+            )
+        else:
+            fitted = lscov_dm_to_dmdt(
+                t_sorted,
+                dm_sorted,
+                sigma_dm_sorted,
+                start[refit],
+                stop[refit],
+                lsq_method,
+            )
+        fit_dmdt[refit], fit_sigma_dmdt[refit] = fitted
+
+        dmdt = fit_dmdt.copy()
+        sigma_dmdt = fit_sigma_dmdt.copy()
+        if settings["tapering"]:
+            taper_ends(tout, dmdt, sigma_dmdt)
+
+        return cls(
+            t,
+            dm,
+            sigma_dm,
+            tout,
+            settings,
+            tout_follows_t,
+            wmin,
+            wmax,
+            fit_dmdt,
+            fit_sigma_dmdt,
+            dmdt,
+            sigma_dmdt,
+            is_sorted=is_sorted,
+            sums=sums,
+        )
+
+
+def _same(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    element-wise equality, treating NaN values as equal
+    """
+    return (a == b) | (np.isnan(a) & np.isnan(b))
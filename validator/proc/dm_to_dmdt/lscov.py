@@ -44,3 +44,39 @@ def lscov(
 
         return x, dx
     return x
+
+
+def lscov_diag(
+    a: np.ndarray, b: np.ndarray, v: np.ndarray = None, dx: bool = False
+) -> np.ndarray:
+    """
+    lscov for a diagonal covariance matrix, given as the vector of its
+    diagonal elements. Equivalent to `lscov(a, b, np.diag(v), dx)`, but
+    scales the rows of `a` and `b` and uses a thin QR factorisation, so
+    no m-by-m matrices are built.
+    """
+
+    m, n = a.shape
+    if m < n:
+        raise Exception(f"problem must be over-determined so that M > N. ({m}, {n})")
+
+    if v is not None:
+        if v.shape != (m,):
+            raise Exception("v must be a vector of length {0}".format(m))
+
+        # whiten the problem using the inverse standard deviations
+        s = 1.0 / np.sqrt(v)
+        a = a * s[:, np.newaxis]
+        b = b * s
+
+    q, r = qr(a, mode="reduced")
+    x = solve(r, q.T.dot(b))
+
+    if dx:
+        res = b - a.dot(x)
+        mse = res.dot(res) / (m - n)
+        ri = solve(r, np.eye(n)).T
+        dx = np.sqrt(np.sum(ri * ri, axis=0) * mse).T
+
+        return x, dx
+    return x
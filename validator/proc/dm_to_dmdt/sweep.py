@@ -0,0 +1,60 @@
+from typing import Sequence, Tuple
+import numpy as np
+
+from .cumulative import fit_windows, window_sums
+from .dm_to_dmdt import CUMULATIVE_METHODS, LSQMethod, lscov_dm_to_dmdt, taper_ends
+from .window_index import sort_series, window_extents, window_index
+
+
+def dm_to_dmdt_sweep(
+    t: np.ndarray,
+    dm: np.ndarray,
+    sigma_dm: np.ndarray,
+    wsizes: Sequence[float],
+    tout: np.ndarray = None,
+    truncate: bool = True,
+    lsq_method: LSQMethod = LSQMethod.normal,
+    tapering: bool = False,
+    min_tapering: float = 0.75,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    create dmdt time series from dm data for several window sizes.
+
+    returns the output postings and (wsize x tout) arrays of dmdt
+    and its error. the input is sorted and indexed once for all
+    window sizes, and cumulative fitting methods share one set of
+    prefix sums
+    """
+    # prevent user from applying conflicting options
+    assert not (truncate and tapering), "conflicting options specified"
+
+    # output postings are optional, produce records at
+    #  same postings as input if not provided
+    if tout is None:
+        tout = t
+
+    # calc. window extents for every size at once,
+    #  with one row per window size
+    wsize = np.asarray(wsizes, dtype=np.float64)[:, np.newaxis]
+    wmin, wmax = window_extents(t, tout, wsize, truncate, tapering, min_tapering)
+
+    t, dm, sigma_dm = sort_series(t, dm, sigma_dm)
+    start, stop = window_index(t, wmin, wmax)
+
+    if lsq_method in CUMULATIVE_METHODS:
+        sums = window_sums(t, dm, sigma_dm, CUMULATIVE_METHODS[lsq_method])
+        dmdt, slope_se, rms_sigma = fit_windows(sums, start, stop)
+        sigma_dmdt = np.sqrt(slope_se**2 + rms_sigma**2)
+    else:
+        dmdt = np.empty(start.shape, dtype=t.dtype)
+        sigma_dmdt = np.empty(start.shape, dtype=t.dtype)
+        for k in range(wsize.size):
+            dmdt[k], sigma_dmdt[k] = lscov_dm_to_dmdt(
+                t, dm, sigma_dm, start[k], stop[k], lsq_method
+            )
+
+    if tapering:
+        for k in range(wsize.size):
+            taper_ends(tout, dmdt[k], sigma_dmdt[k])
+
+    return tout, dmdt, sigma_dmdt
@@ -0,0 +1,84 @@
+from typing import Tuple
+import numpy as np
+
+
+def sort_series(t: np.ndarray, *columns: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    return the series ordered by time. input which is already
+    monotonic is returned as-is, without copying
+    """
+    if np.all(t[1:] >= t[:-1]):
+        return (t, *columns)
+
+    order = np.argsort(t, kind="stable")
+    return (t[order], *[col[order] for col in columns])
+
+
+def window_extents(
+    t: np.ndarray,
+    tout: np.ndarray,
+    wsize: float,
+    truncate: bool,
+    tapering: bool,
+    min_tapering: float,
+    *,
+    t_range: Tuple[np.ndarray, np.ndarray] = None,
+    tout_range: Tuple[np.ndarray, np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    calculate the fitting window [wmin, wmax) of every output posting.
+    postings which produce no output have NaN extents.
+
+    the start and end times of the input and output series can be given
+    per posting with `t_range` and `tout_range`, for postings of several
+    series stored end-to-end.
+    """
+    # size of half the window
+    w_halfsize = wsize / 2.0
+
+    # get start and end times of input and output series
+    tmin, tmax = (np.min(t), np.max(t)) if t_range is None else t_range
+    tout_min, tout_max = (tout.min(), tout.max()) if tout_range is None else tout_range
+
+    # calc. extents of fitting windows
+    wmin = tout - w_halfsize
+    wmax = tout + w_halfsize
+
+    outside = (tout < tmin) | (tout > tmax)
+    # check if windows overlap data boundaries
+    at_edge = (wmin < tmin) | (wmax > tmax)
+
+    if truncate:
+        # truncate mode: clip the output series
+        #  to avoid producing values from incomplete
+        #  windows
+        outside = outside | at_edge
+    elif tapering:
+        # tapering mode: reduce size of window
+        #  near the ends of the time series in
+        #  order to maintain a symetrical window.
+        w_tapered = np.minimum(tout_max - tout, tout - tout_min)
+        if min_tapering is not None:
+            w_tapered = np.maximum(w_tapered, min_tapering)
+        wmin = np.where(at_edge, tout - w_tapered, wmin)
+        wmax = np.where(at_edge, tout + w_tapered, wmax)
+    else:
+        # otherwise get the portion of the window that is valid
+        wmin = np.where(at_edge, np.maximum(wmin, tmin), wmin)
+        wmax = np.where(at_edge, np.minimum(wmax, tmax), wmax)
+
+    wmin = np.where(outside, np.nan, wmin)
+    wmax = np.where(outside, np.nan, wmax)
+
+    return wmin, wmax
+
+
+def window_index(
+    t: np.ndarray, wmin: np.ndarray, wmax: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    get the [start, stop) record offsets of each window within the
+    sorted times `t`. windows with NaN extents are empty
+    """
+    start, stop = np.searchsorted(t, np.stack([wmin, wmax]), side="left")
+    return start, stop